@@ -0,0 +1,456 @@
+import sys
+from collections import Counter
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+from chat_parser import DAY_NAMES, MONTH_NAMES
+from text_features import count_emojis, count_words
+
+# Bumped when the user index / ChatStats layout changes, so cached indexes
+# and saved chat states from older versions are rebuilt instead of reused
+INDEX_VERSION = 4
+
+
+def _counts(series):
+    # First-appearance order, so counters fed batch by batch break ties
+    # the same way as one big batch. Categoricals are counted on their
+    # codes (value_counts would list every category, in category order)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        codes = codes[codes >= 0]
+        order = pd.unique(codes)
+        counts = np.bincount(codes, minlength=len(series.cat.categories))[order]
+        return dict(zip(series.cat.categories[order], counts.tolist()))
+    return series.value_counts(sort=False).to_dict()
+
+
+def _value_counts(counter, index_name, sort=True):
+    # Same shape as `Series.value_counts()` so charts keep their axis titles
+    counts = pd.Series(counter, dtype="int64", name="count").rename_axis(index_name)
+    if sort:
+        return counts.sort_values(ascending=False, kind="stable")
+    return counts.sort_index()
+
+
+COUNTERS = ("users", "sentiment", "words", "emojis")
+
+HOURS = 24
+
+
+# ------------------ ACTIVITY CUBE ------------------
+class ActivityCube:
+    """Message counts per member x day x hour of day, from one `np.bincount`.
+
+    `counts[u, d, h]` is how many messages `users[u]` sent on day
+    `start + d` in hour `h`; slot `HOURS` holds messages whose time did
+    not parse. The timeline, weekday / month totals, the hour x weekday
+    heatmap and weekly / monthly series are all sums over this array,
+    so no panel goes back to the message rows. Cubes merge with `+=` and
+    `-=` (aligning members and dates), like `ChatStats`.
+    """
+
+    def __init__(self, users=(), start=None, counts=None):
+        self.users = list(users)
+        self.start = start
+        self.counts = np.zeros((len(self.users), 0, HOURS + 1), dtype=np.int32) if counts is None else counts
+
+    @classmethod
+    def from_frame(cls, df):
+        if not len(df):
+            return cls()
+        if isinstance(df["User"].dtype, pd.CategoricalDtype):
+            # Only the members present get a row: one member's rows must not
+            # allocate a (members x days) cube for the whole chat
+            codes, present = pd.factorize(df["User"].cat.codes.to_numpy(np.int64), sort=True)
+            users = df["User"].cat.categories[present].astype(str)
+        else:
+            codes, users = pd.factorize(df["User"], sort=True)
+        days = df["Date"].to_numpy().astype("datetime64[D]")
+        start = days.min()
+        day = (days - start).astype(np.int64)
+        if "Timestamp" in df:
+            hour = df["Timestamp"].dt.hour.fillna(HOURS).to_numpy(dtype=np.int64)
+        else:
+            hour = np.full(len(df), HOURS)
+        shape = (len(users), int(day.max()) + 1, HOURS + 1)
+        flat = (codes * shape[1] + day) * shape[2] + hour
+        counts = np.bincount(flat, minlength=np.prod(shape)).astype(np.int32).reshape(shape)
+        return cls(users, start, counts)._trimmed()
+
+    @classmethod
+    def combine(cls, cubes, signs=None):
+        """Sum (or with `signs` of -1, subtract) cubes over the union of their members and dates."""
+        cubes = [cube for cube in cubes if cube.counts.shape[1]]
+        if not cubes:
+            return cls()
+        users = sorted(set().union(*(cube.users for cube in cubes)))
+        rows = {user: i for i, user in enumerate(users)}
+        start = min(cube.start for cube in cubes)
+        end = max(cube.start + cube.counts.shape[1] for cube in cubes)
+        counts = np.zeros((len(users), int((end - start).astype(np.int64)), HOURS + 1), dtype=np.int32)
+        for cube, sign in zip(cubes, signs or [1] * len(cubes)):
+            offset = int((cube.start - start).astype(np.int64))
+            target = counts[:, offset:offset + cube.counts.shape[1]]
+            target[[rows[user] for user in cube.users]] += sign * cube.counts
+        return cls(users, start, counts)._trimmed()
+
+    def _trimmed(self):
+        # Drop members and leading / trailing days left without messages
+        keep = self.counts.any(axis=(1, 2))
+        days = np.flatnonzero(self.counts.any(axis=(0, 2)))
+        if not len(days):
+            return ActivityCube()
+        self.users = [user for user, kept in zip(self.users, keep) if kept]
+        self.counts = self.counts[keep, days[0]:days[-1] + 1]
+        self.start = self.start + days[0]
+        return self
+
+    def __iadd__(self, other):
+        merged = ActivityCube.combine([self, other])
+        self.users, self.start, self.counts = merged.users, merged.start, merged.counts
+        return self
+
+    def __isub__(self, other):
+        merged = ActivityCube.combine([self, other], [1, -1])
+        self.users, self.start, self.counts = merged.users, merged.start, merged.counts
+        return self
+
+    def copy(self):
+        return ActivityCube(self.users, self.start, self.counts.copy())
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes
+
+    # ------------------ VIEWS ------------------
+    def dates(self):
+        return self.start + np.arange(self.counts.shape[1]) if self.start is not None else np.array([], "datetime64[D]")
+
+    def per_day(self):
+        return self.counts.sum(axis=(0, 2))
+
+    def _first_seen(self, keys, per_day):
+        # Keys in order of their first active day, so ties sort as first seen
+        return pd.unique(keys[per_day > 0])
+
+    def timeline(self):
+        per_day = self.per_day()
+        active = np.flatnonzero(per_day)
+        index = pd.DatetimeIndex(self.dates()[active].astype("datetime64[s]"), name="Date")
+        return pd.Series(per_day[active], index=index, dtype="int64", name="count")
+
+    def day_counts(self):
+        per_day = self.per_day()
+        # 1970-01-01 was a Thursday
+        weekdays = (self.dates().astype(np.int64) + 3) % 7
+        totals = np.bincount(weekdays, weights=per_day, minlength=7).astype(np.int64)
+        order = self._first_seen(weekdays, per_day)
+        return _value_counts({DAY_NAMES[i]: totals[i] for i in order}, "DayName")
+
+    def month_counts(self):
+        per_day = self.per_day()
+        months = self.dates().astype("datetime64[M]").astype(np.int64) % 12
+        totals = np.bincount(months, weights=per_day, minlength=12).astype(np.int64)
+        order = self._first_seen(months, per_day)
+        return _value_counts({MONTH_NAMES[i]: totals[i] for i in order}, "MonthName")
+
+    def heatmap(self):
+        """Weekday x hour message counts (messages without a time left out)."""
+        by_hour = self.counts[:, :, :HOURS].sum(axis=0)
+        weekdays = (self.dates().astype(np.int64) + 3) % 7
+        grid = np.zeros((7, HOURS), dtype=np.int64)
+        np.add.at(grid, weekdays, by_hour)
+        return pd.DataFrame(grid, index=pd.Index(DAY_NAMES, name="DayName"),
+                            columns=pd.RangeIndex(HOURS, name="Hour"))
+
+    def resample(self, freq="W", by_user=False):
+        """Messages per `freq` period ("D", "W", "MS", ...); one column per member with `by_user`."""
+        dates = pd.DatetimeIndex(self.dates().astype("datetime64[s]"), name="Date")
+        if by_user:
+            frame = pd.DataFrame(self.counts.sum(axis=2).T, index=dates, columns=self.users, dtype="int64")
+            return frame.resample(freq).sum()
+        return pd.Series(self.per_day(), index=dates, dtype="int64", name="count").resample(freq).sum()
+
+
+# ------------------ RUNNING STATS ------------------
+class ChatStats:
+    """Dashboard counters that can be fed one parsed batch at a time.
+
+    Pair with `chat_parser.iter_chat_batches` to analyse exports that do
+    not fit in memory: only the counters are kept between batches. Stats
+    for disjoint sets of messages can be merged with `+=`, and a subset's
+    stats removed again with `-=`.
+
+    With `text=False` only messages, members and activity are counted;
+    sentiment, words and emojis are left empty, so a chat that has only
+    been parsed gets its counts without scanning the message text.
+    """
+
+    def __init__(self, text=True):
+        self.text = text
+        self.messages = 0
+        self.users = Counter()
+        self.activity = ActivityCube()
+        self.sentiment = Counter()
+        self.words = Counter()
+        self.emojis = Counter()
+
+    def update(self, df):
+        # Fed in export order (the row labels), so counter ties rank by first
+        # appearance however the rows were sorted or split into batches
+        if not df.index.is_monotonic_increasing:
+            df = df.iloc[np.argsort(df.index.to_numpy(), kind="stable")]
+        self.messages += len(df)
+        self.users.update(_counts(df["User"]))
+        self.activity += ActivityCube.from_frame(df)
+        if not self.text:
+            return self
+        if "Sentiment" in df:
+            self.sentiment.update(_counts(df["Sentiment"]))
+
+        # Reuse the enrichment columns when the chat went through pipeline.enrich
+        if "Words" in df:
+            self.words.update(chain.from_iterable(df["Words"]))
+        else:
+            count_words(df["Message"], counter=self.words)
+        if "Emojis" in df:
+            self.emojis.update(chain.from_iterable(df["Emojis"]))
+        else:
+            count_emojis(df["Message"], counter=self.emojis)
+        return self
+
+    def __iadd__(self, other):
+        self.messages += other.messages
+        self.activity += other.activity
+        for name in COUNTERS:
+            getattr(self, name).update(getattr(other, name))
+        return self
+
+    def __isub__(self, other):
+        self.messages -= other.messages
+        self.activity -= other.activity
+        for name in COUNTERS:
+            counter = getattr(self, name)
+            counter -= getattr(other, name)
+        return self
+
+    def copy(self):
+        stats = ChatStats(self.text)
+        stats.messages = self.messages
+        stats.activity = self.activity.copy()
+        for name in COUNTERS:
+            setattr(stats, name, Counter(getattr(self, name)))
+        return stats
+
+    @classmethod
+    def from_batches(cls, batches, text=True):
+        stats = cls(text)
+        for df in batches:
+            stats.update(df)
+        return stats
+
+    @classmethod
+    def merged(cls, stats):
+        """Stats of several disjoint sets of messages, with one cube allocation."""
+        total = cls(all(part.text for part in stats))
+        for part in stats:
+            total.messages += part.messages
+            for name in COUNTERS:
+                getattr(total, name).update(getattr(part, name))
+        total.activity = ActivityCube.combine([part.activity for part in stats])
+        return total
+
+    @property
+    def nbytes(self):
+        # Counter tables only: the word / emoji strings are shared with the chat's columns
+        return self.activity.nbytes + sum(sys.getsizeof(getattr(self, name)) for name in COUNTERS)
+
+    # ------------------ VIEWS ------------------
+    @property
+    def active_days(self):
+        return int(np.count_nonzero(self.activity.per_day()))
+
+    def user_counts(self):
+        return _value_counts(self.users, "User")
+
+    def timeline(self):
+        return self.activity.timeline()
+
+    def day_counts(self):
+        return self.activity.day_counts()
+
+    def month_counts(self):
+        return self.activity.month_counts()
+
+    def sentiment_counts(self):
+        return _value_counts(self.sentiment, "Sentiment")
+
+    def summary(self, top_words=20, top_emojis=10):
+        """Everything the dashboard panels show, computed once."""
+        return {
+            "messages": self.messages,
+            "active_days": self.active_days,
+            "users": self.user_counts(),
+            "sentiment": self.sentiment_counts(),
+            "timeline": self.timeline(),
+            "days": self.day_counts(),
+            "months": self.month_counts(),
+            "heatmap": self.activity.heatmap(),
+            "activity": self.activity,
+            "words": self.words.most_common(top_words),
+            "word_freq": dict(self.words),
+            "emojis": self.emojis.most_common(top_emojis),
+        }
+
+
+# ------------------ PER-USER INDEX ------------------
+def user_stats(df, text=True):
+    """{member: (row positions, ChatStats)} from one groupby pass."""
+    return {
+        user: (rows, ChatStats(text).update(df.iloc[rows]))
+        for user, rows in df.groupby("User", sort=True, observed=True).indices.items()
+    }
+
+
+def index_from_stats(members, overall, top_words=20, top_emojis=10):
+    """Dashboard index from `user_stats` output and the whole chat's stats.
+
+    "Overall" is counted from the chat itself rather than merged from the
+    members, so words, emojis and members with equal counts rank in order
+    of first appearance, as in a single pass (or `--stream`) over the
+    export, not in member order.
+    """
+    index = {}
+    for user in sorted(members):
+        rows, stats = members[user]
+        index[user] = {"rows": rows, "stats": stats, **stats.summary(top_words, top_emojis)}
+
+    index["Overall"] = {"rows": None, "stats": overall, **overall.summary(top_words, top_emojis)}
+    return index
+
+
+def summary_nbytes(summary):
+    """Approximate memory of an index entry or a `selection_stats` result."""
+    total = 0
+    for name, value in summary.items():
+        if name == "activity":  # the cube of `summary["stats"]`
+            continue
+        if isinstance(value, (ChatStats, np.ndarray)):
+            total += value.nbytes
+        elif isinstance(value, (pd.Series, pd.DataFrame)):
+            total += int(np.sum(value.memory_usage(deep=True)))
+        elif isinstance(value, (dict, list)):
+            total += sys.getsizeof(value)
+    return total
+
+
+def index_nbytes(index):
+    return sum(summary_nbytes(entry) for entry in index.values())
+
+
+def build_user_index(df, top_words=20, top_emojis=10, text=True):
+    """Precompute panel stats for every member and for "Overall".
+
+    Each entry also keeps the member's row positions in `df` (sorted, like
+    the chat, by time), so the rows can be taken without scanning the
+    User column again, and the `ChatStats` behind the panels, so member
+    sets and date ranges start from counts that are already there. With
+    `text=False` the sentiment, word and emoji panels stay empty (see
+    `ChatStats`).
+    """
+    return index_from_stats(user_stats(df, text), ChatStats(text).update(df), top_words, top_emojis)
+
+
+# ------------------ CHAT PREVIEW ------------------
+# Messages the chat preview leaves out
+HIDDEN_MESSAGES = ["", "this message was deleted", "message deleted", "<media omitted>", "media omitted"]
+
+
+def preview_mask(df):
+    """Boolean array, True for rows the chat preview shows."""
+    return ~df["Message"].isin(HIDDEN_MESSAGES).to_numpy()
+
+
+def member_rows(index, users):
+    """Sorted row positions of `users` in the chat, or None for everyone."""
+    if not users or "Overall" in users:
+        return None
+    if len(users) == 1:
+        return index[users[0]]["rows"]
+    # Each member's rows are sorted, so the stable sort only merges runs
+    return np.sort(np.concatenate([index[user]["rows"] for user in users]), kind="stable")
+
+
+def preview_rows(rows, visible):
+    """Sorted positions of the previewed rows among `rows` (None = the whole chat)."""
+    if rows is None:
+        return np.flatnonzero(visible)
+    return rows[visible[rows]]
+
+
+def page_of_date(dates, rows, date, page_size):
+    """Newest-first page holding the last message on or before `date`.
+
+    `dates` is the chat's (sorted) Date column as datetime64, `rows` the
+    previewed positions in chat order.
+    """
+    end = np.datetime64(date, "D") + np.timedelta64(1, "D")
+    before = int(np.searchsorted(rows, np.searchsorted(dates, end, side="left"), side="left"))
+    # Dates before the first message land on the last (oldest) page
+    return max(min(len(rows) - before, len(rows) - 1), 0) // page_size
+
+
+# ------------------ SELECTIONS ------------------
+def date_slice(dates, start=None, end=None):
+    """Positions [lo, hi) of the messages dated `start`..`end` (both inclusive).
+
+    `dates` is the Date column of a time-sorted chat, so this is two
+    binary searches instead of a mask over every message.
+    """
+    lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+    hi = len(dates) if end is None else int(
+        np.searchsorted(dates, np.datetime64(end, "D") + np.timedelta64(1, "D"), side="left"))
+    return lo, max(hi, lo)
+
+
+def selection_stats(df, index, users=None, start=None, end=None, top_words=20, top_emojis=10):
+    """Panel stats for the messages of `users` (None / "Overall" = everyone) from `start` to `end`.
+
+    Returns an entry shaped like the user index ones, whose "rows" are
+    the selected positions in `df` (None for the whole chat). A single
+    member over the whole chat is the index entry itself; a member set
+    merges the members' precomputed stats. Within a date range only the
+    smaller side is counted from the rows: the messages inside it, or
+    those outside it, subtracted from the selection's totals.
+    """
+    members = [user for user in users or () if user != "Overall"]
+    rows = member_rows(index, members)
+    lo, hi = date_slice(df["Date"].to_numpy(), start, end)
+    if len(members) <= 1 and (lo, hi) == (0, len(df)):
+        return index[members[0] if members else "Overall"]
+
+    if len(members) > 1:
+        total = ChatStats.merged([index[user]["stats"] for user in members])
+    else:
+        total = index[members[0] if members else "Overall"]["stats"]
+
+    if rows is None:
+        inside, outside = [slice(lo, hi)], [slice(0, lo), slice(hi, len(df))]
+        selected = np.arange(lo, hi)
+        available = len(df)
+    else:
+        first, last = np.searchsorted(rows, [lo, hi])
+        inside, outside = [rows[first:last]], [rows[:first], rows[last:]]
+        selected = rows[first:last]
+        available = len(rows)
+
+    if len(selected) == available:
+        stats = total
+    elif len(selected) <= available - len(selected):
+        stats = ChatStats.from_batches((df.iloc[part] for part in inside), total.text)
+    else:
+        stats = total.copy()
+        stats -= ChatStats.from_batches((df.iloc[part] for part in outside), total.text)
+    return {"rows": selected, "stats": stats, **stats.summary(top_words, top_emojis)}
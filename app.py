@@ -1,26 +1,29 @@
 import streamlit as st
 import pandas as pd
-import re
-from textblob import TextBlob
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-import emoji
-from collections import Counter
-import nltk
-
-# Download required NLTK data for TextBlob
+import io
+import os
+from functools import partial
+from chat_cache import LRUCache, content_key, frame_nbytes
+from pipeline import prepare
+from aggregates import (INDEX_VERSION, build_user_index, date_slice, index_nbytes, page_of_date, preview_mask,
+                        preview_rows, selection_stats, summary_nbytes)
+from chat_parser import DAY_NAMES, parse_chat
+from conversations import SESSION_GAP, Conversations
+from incremental import analyze_export
+from profiling import profiler_from_env, stage
+from search import SEARCH_VERSION, SearchIndex
+from sentiment import BACKENDS, get_backend
+from storage import chat_to_bytes, columnar_format, load_chat_file
+import warmup
+
+# 🔥 Sentiment lexicon, emoji table and NLTK corpora load in a background
+# thread, so the page shows up before they are ready. matplotlib and
+# wordcloud are only imported by the panels that draw with them.
 @st.cache_resource
-def download_nltk_data():
-    try:
-        nltk.data.find('tokenizers/punkt')
-    except LookupError:
-        nltk.download('punkt', quiet=True)
-    try:
-        nltk.data.find('corpora/brown')
-    except LookupError:
-        nltk.download('brown', quiet=True)
+def start_warm_up():
+    return warmup.start()
 
-download_nltk_data()
+start_warm_up()
 
 st.markdown("""
 <style>
@@ -49,156 +52,171 @@ st.title("📊 WhatsApp Chat Analyzer AI")
 st.write("Upload your exported WhatsApp chat (.txt) to analyze group or individual members")
 
 # ------------------ FILE UPLOAD ------------------
-uploaded_file = st.file_uploader("Upload WhatsApp Chat File", type=["txt"])
+uploaded_file = st.file_uploader("Upload WhatsApp Chat File", type=["txt", "parquet", "feather"])
 
-# ------------------ CHAT PARSER ------------------
-def parse_chat(file):
-    messages = []
+# 🧠 TextBlob is the reference; the lexicon backend is much faster on big chats
+backends = list(BACKENDS)
+sentiment_backend = st.selectbox(
+    "Sentiment backend", backends, index=backends.index(get_backend().name),
+    help="lexicon: TextBlob's word list scored in batches, much faster with near-identical labels",
+)
 
-    pattern = re.compile(
-        r'^(\d{1,2}/\d{1,2}/\d{2,4}),\s*'
-        r'(\d{1,2}:\d{2}[\u202f ]?(?:am|pm|AM|PM)?)\s*-\s*'
-        r'([^:]+):\s*(.*)$'
-    )
 
-    system_pattern = re.compile(
-        r'(added|removed|changed|joined|left|deleted|media omitted)',
-        re.IGNORECASE
-    )
+# 🔥 The default backend warms up at launch; another one starts loading as
+# soon as it is picked, before any tab needs its scores
+@st.cache_resource
+def start_backend_warm_up(backend):
+    return warmup.start_backend(backend)
 
-    current_message = None
 
-    for raw_line in file:
-        line = raw_line.decode("utf-8", errors="ignore").strip()
+if sentiment_backend != get_backend().name:
+    start_backend_warm_up(sentiment_backend)
 
-        # 1️⃣ Check normal user message
-        match = pattern.match(line)
-        if match:
-            date, time, user, message = match.groups()
+# ------------------ DISK BUDGET ------------------
+# CHAT_CACHE_DISK_MB is one budget for everything under CHAT_CACHE_DIR,
+# split between the caches that keep an on-disk tier.
+DISK_SHARES = {"chats": 0.4, "exports": 0.4, "search": 0.2}
 
-            # skip empty or system-like messages
-            if system_pattern.search(message):
-                current_message = None
-                continue
 
-            current_message = [date, time, user, message]
-            messages.append(current_message)
-            continue
+def disk_max_bytes(tier):
+    return int(float(os.environ.get("CHAT_CACHE_DISK_MB", 4096)) * DISK_SHARES[tier] * 1024 ** 2)
 
-        # 2️⃣ Skip pure system lines
-        if system_pattern.search(line):
-            current_message = None
-            continue
 
-        # 3️⃣ Append ONLY real multiline text
-        if current_message is not None:
-            current_message[3] += " " + line
+# ------------------ PARSED CHAT CACHE ------------------
+# Keyed by a hash of the uploaded bytes, so widget reruns (e.g. switching
+# member) reuse the parsed + enriched chat instead of re-parsing it.
+@st.cache_resource
+def get_chat_cache():
+    return LRUCache(
+        max_entries=int(os.environ.get("CHAT_CACHE_ENTRIES", 8)),
+        max_bytes=int(float(os.environ.get("CHAT_CACHE_MB", 1024)) * 1024 ** 2),
+        sizeof=lambda chat: frame_nbytes(chat[0]) + index_nbytes(chat[1]),
+        disk_dir=os.environ.get("CHAT_CACHE_DIR") or None,
+        disk_max_bytes=disk_max_bytes("chats"),
+    )
 
-    df = pd.DataFrame(messages, columns=["Date", "Time", "User", "Message"])
-    df["Date"] = pd.to_datetime(df["Date"], dayfirst=True, errors="coerce")
-    df["Date"] = df["Date"].dt.date
-    df["Message"] = df["Message"].str.lower().str.strip()
-    df["Date"] = pd.to_datetime(df["Date"], dayfirst=True, errors="coerce")
-    df = df.dropna(subset=["Date"])
 
-    return df.dropna()
+# Analysed .txt exports keyed by a fingerprint of their first lines. A
+# newer export of the same chat only parses and scores the new messages.
+@st.cache_resource
+def get_export_cache():
+    disk_dir = os.environ.get("CHAT_CACHE_DIR")
+    return LRUCache(
+        max_entries=int(os.environ.get("EXPORT_CACHE_ENTRIES", 8)),
+        max_bytes=int(float(os.environ.get("EXPORT_CACHE_MB", 1024)) * 1024 ** 2),
+        sizeof=lambda state: frame_nbytes(state.df) + index_nbytes(state.index),
+        disk_dir=os.path.join(disk_dir, "exports") if disk_dir else None,
+        disk_max_bytes=disk_max_bytes("exports"),
+    )
 
 
-# ------------------ SENTIMENT ------------------
-def get_sentiment(text):
-    polarity = TextBlob(str(text)).sentiment.polarity
-    if polarity > 0:
-        return "Positive"
-    elif polarity < 0:
-        return "Negative"
-    return "Neutral"
+# ------------------ SELECTION CACHE ------------------
+# Panel stats per (chat, members, date range), so switching tabs or paging
+# the preview does not count the selection again.
+@st.cache_resource
+def get_selection_cache():
+    return LRUCache(
+        max_entries=int(os.environ.get("SELECTION_CACHE_ENTRIES", 32)),
+        max_bytes=int(float(os.environ.get("SELECTION_CACHE_MB", 256)) * 1024 ** 2),
+        sizeof=summary_nbytes,
+    )
 
-# ------------------ EMOJI EXTRACT ------------------
-def extract_emojis(text):
-    return [c for c in text if c in emoji.EMOJI_DATA]
 
-# ------------------ MAIN APP ------------------
-if uploaded_file is not None:
-    df_all = parse_chat(uploaded_file)
+# ------------------ PREVIEW CACHE ------------------
+# Which rows the chat preview shows, one boolean per message, per chat.
+@st.cache_resource
+def get_preview_cache():
+    return LRUCache(
+        max_entries=int(os.environ.get("CHAT_CACHE_ENTRIES", 8)),
+        sizeof=lambda visible: visible.nbytes,
+    )
 
-    if df_all.empty:
-        st.error("❌ Could not parse chat file")
-        st.stop()
 
-    st.success(f"✅ Parsed {len(df_all)} messages")
+PREVIEW_PAGE_SIZES = [25, 50, 100, 250, 500]
 
-    df_all["Sentiment"] = df_all["Message"].apply(get_sentiment)
-    df_all["DayName"] = df_all["Date"].dt.day_name()
-    df_all["MonthName"] = df_all["Date"].dt.month_name()
 
-    # ------------------ USER SELECTION ------------------
-    users = ["Overall"] + sorted(df_all["User"].unique())
-    selected_user = st.selectbox("Select Member for Analysis", users)
+# ------------------ SEARCH INDEX CACHE ------------------
+# Inverted word index per chat, built on the first search and kept next to
+# the parsed chat (and on disk with CHAT_CACHE_DIR).
+@st.cache_resource
+def get_search_cache():
+    disk_dir = os.environ.get("CHAT_CACHE_DIR")
+    return LRUCache(
+        max_entries=int(os.environ.get("CHAT_CACHE_ENTRIES", 8)),
+        sizeof=lambda index: index.nbytes,
+        disk_dir=os.path.join(disk_dir, "search") if disk_dir else None,
+        disk_max_bytes=disk_max_bytes("search"),
+    )
+
 
-    df = df_all if selected_user == "Overall" else df_all[df_all["User"] == selected_user]
+SEARCH_RESULTS = 200
 
-    st.header("👥 Overall Group Analysis" if selected_user == "Overall"
-              else f"👤 Analysis for: {selected_user}")
+# Timeline grouping -> pandas frequency (the daily series needs no resampling)
+TIMELINE_PERIODS = {"Day": "D", "Week": "W", "Month": "MS"}
+COMPARED_MEMBERS = 5
 
-    # ------------------ METRICS ------------------
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Total Messages", len(df))
-    col2.metric("Active Days", df["Date"].nunique())
-    col3.metric("Avg Messages / Day", round(len(df) / df["Date"].nunique(), 2))
 
-    left, right = st.columns(2)
+# ------------------ CONVERSATIONS CACHE ------------------
+# Sessions and reply latencies per (chat, session gap), derived on the
+# first visit to the Conversations tab.
+@st.cache_resource
+def get_conversation_cache():
+    return LRUCache(
+        max_entries=int(os.environ.get("CHAT_CACHE_ENTRIES", 8)),
+        sizeof=lambda conversations: conversations.nbytes,
+    )
 
-    with left:
-        st.subheader("📌 Messages per User")
-        data = df_all["User"].value_counts() if selected_user == "Overall" else df["User"].value_counts()
-        st.bar_chart(data)
 
-    with right:
-        st.subheader("🥧 Member Activity Distribution")
-        fig, ax = plt.subplots()
-        ax.pie(data.values, labels=data.index, autopct="%1.1f%%", startangle=90)
-        ax.axis("equal")
-        st.pyplot(fig)
+SESSION_GAPS = [15, 30, 60, 120, 240, 480]
+TOP_CONVERSATIONS = 10
 
 
-    left, right = st.columns(2)
+# ------------------ RENDER CACHE ------------------
+# Finished PNGs keyed by (chat hash, member, panel, size). Figures are
+# closed right after saving, so pyplot never accumulates them across reruns.
+@st.cache_resource
+def get_render_cache():
+    return LRUCache(
+        max_entries=int(os.environ.get("RENDER_CACHE_ENTRIES", 64)),
+        max_bytes=int(float(os.environ.get("RENDER_CACHE_MB", 64)) * 1024 ** 2),
+        sizeof=len,
+    )
 
-    with left:
-        st.subheader("🧠 Sentiment Distribution")
-        st.bar_chart(df["Sentiment"].value_counts())
 
-    with right:
-        st.subheader("📈 Activity Timeline")
-        timeline = df["Date"].value_counts().sort_index()
-        st.line_chart(timeline)
+def render_png(key, draw):
+    def build():
+        import matplotlib.pyplot as plt
 
+        fig = draw()
+        try:
+            image = io.BytesIO()
+            fig.savefig(image, format="png", dpi=200, bbox_inches="tight")
+            return image.getvalue()
+        finally:
+            plt.close(fig)
 
+    return get_render_cache().get_or_create(key, build)
 
-    # ------------------ WORD CLOUD ------------------
-    
 
-    from wordcloud import STOPWORDS, WordCloud
+def draw_pie(data, figsize=(6.4, 4.8)):
     import matplotlib.pyplot as plt
 
-    stop_words = STOPWORDS.union({
-        "media", "omitted", "<media", "omitted>", "this", "message", "was", "deleted",
-        "the", "and", "to", "a", "in", "of"
-    })
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.pie(data.values, labels=data.index, autopct="%1.1f%%", startangle=90)
+    ax.axis("equal")
+    return fig
 
-    words = [
-        word.lower() for word in " ".join(df["Message"]).split()
-        if word.isalpha() and word.lower() not in stop_words
-    ]
 
-    clean_text = " ".join(words)
+def draw_word_cloud(words, width=850, height=400):
+    import matplotlib.pyplot as plt
+    from wordcloud import WordCloud
 
     wc = WordCloud(
-        width=850,
-        height=400,
+        width=width,
+        height=height,
         background_color="rgba(13, 13, 26, 0)",  # ✅ transparent background
-        stopwords=stop_words,
         margin=0
-    ).generate(clean_text)
+    ).generate_from_frequencies(words)
 
     fig, ax = plt.subplots(figsize=(10, 4))
 
@@ -206,92 +224,400 @@ if uploaded_file is not None:
     fig.patch.set_facecolor((13/255, 13/255, 26/255, 0))
     ax.set_facecolor((13/255, 13/255, 26/255, 0))
 
-
     ax.imshow(wc, interpolation="bilinear")
     ax.axis("off")
-
-
-
-
-    text = " ".join(df["Message"])
-    # ------------------ COMMON WORDS ------------------
-   
-
-    stop_words = {
-        "media", "omitted", "<media", "omitted>","this","message","was","deleted",
-        "the", "and", "to", "a", "in", "of"
+    return fig
+
+
+def load_chat(data, name):
+    """Parsed chat and its per-member counts; sentiment, words and emojis come later."""
+    # A chat exported from this app (Parquet/Feather) is read instead of parsed
+    file_format = columnar_format(name)
+    with stage("parse") as record:
+        df = load_chat_file(io.BytesIO(data), format=file_format) if file_format else parse_chat(data)
+        record["rows"] = len(df)
+    with stage("index", rows=len(df)):
+        return df, build_user_index(df, text=False)
+
+
+def enrich_chat(data, name, df, backend):
+    """`load_chat`'s chat with Sentiment, Emojis and Words, and its full user index."""
+    options = {
+        "workers": int(os.environ.get("ANALYZER_WORKERS", 0)),
+        "chunk_size": int(os.environ.get("ANALYZER_CHUNK_SIZE", 20_000)),
+        "backend": backend,
     }
+    if columnar_format(name):
+        with stage("enrich", rows=len(df)):
+            # Enriched as a shallow copy, so the cached parsed chat is left as it is
+            df = prepare(df.copy(deep=False), **options)
+        with stage("index", rows=len(df)):
+            return df, build_user_index(df)
 
-    words = [
-        word for word in text.split()
-        if word.lower() not in stop_words
-        and word.isalpha()
-    ]
-
-    common_words = Counter(words).most_common(20)
-    df_common = pd.DataFrame(common_words, columns=["Word", "Count"])
+    state = analyze_export(data, get_export_cache(), **options)
+    return state.df, state.index
 
-    # 🔥 START INDEX FROM 1
-    df_common.index = range(1, len(df_common) + 1)
-
-    left, right = st.columns(2)
-
-    with left:
-        st.subheader("☁️ Word Cloud")
-        st.pyplot(fig)   # your existing wordcloud fig
-
-    with right:
-        st.subheader("📝 Most Common Words")
-        st.table(df_common)
-
-
-    left, right = st.columns(2)
-
-    with left:
-        st.subheader("😄 Emoji Analysis")
-        emojis = []
-        for msg in df["Message"]:
-            emojis.extend(extract_emojis(msg))
-
-        if emojis:
-            df_common1=pd.DataFrame(Counter(emojis).most_common(10),
-                                columns=["Emoji", "Count"])
-            df_common1.index = range(1, len(df_common1) + 1)
-            st.table(df_common1)
+# ------------------ MAIN APP ------------------
+if uploaded_file is not None:
+    # ⏱️ Stage timings for this rerun (see the Performance expander)
+    perf = profiler_from_env(file=uploaded_file.name, sentiment=sentiment_backend).start()
+    # finish() runs even when st.stop() or an error ends the rerun early;
+    # otherwise cProfile stays enabled and no later run can start it
+    try:
+        data = uploaded_file.getvalue()
+        chat_key = content_key(data)
+        with perf.stage("load chat") as record, perf.activate():
+            # Parsing and counting only, so the metrics paint without waiting for scoring
+            df_all, user_index = get_chat_cache().get_or_create(
+                f"{chat_key}-v{INDEX_VERSION}", lambda: load_chat(data, uploaded_file.name))
+            record["rows"] = len(df_all)
+
+        # 🧠 Sentiment, words and emojis: the chat is enriched when one of their
+        # tabs (or the download) first needs it, once per sentiment backend
+        enriched_chat = partial(
+            get_chat_cache().get_or_create, f"{chat_key}-{sentiment_backend}-v{INDEX_VERSION}",
+            partial(enrich_chat, data, uploaded_file.name, df_all, sentiment_backend))
+
+        if df_all.empty:
+            st.error("❌ Could not parse chat file")
+            st.stop()
+
+        st.success(f"✅ Parsed {len(df_all)} messages")
+        st.download_button(
+            "⬇️ Download parsed chat (Parquet)",
+            data=lambda: chat_to_bytes(enriched_chat()[0]),
+            file_name="parsed_chat.parquet",
+            mime="application/vnd.apache.parquet",
+        )
+
+        # ------------------ SELECTION ------------------
+        # The chat is sorted by time, so a date range is a slice of it and a
+        # member set the union of the members' rows from the user index
+        members = sorted(user for user in user_index if user != "Overall")
+        member_col, date_col = st.columns([2, 1])
+        selected_users = member_col.multiselect("Select Members for Analysis", members, key="members",
+                                                placeholder="Overall (everyone)")
+        timeline = user_index["Overall"]["timeline"].index
+        first_date, last_date = timeline.min().date(), timeline.max().date()
+        start, end = first_date, last_date
+        if first_date < last_date:
+            start, end = date_col.slider("Dates", min_value=first_date, max_value=last_date,
+                                         value=(first_date, last_date), format="DD MMM YYYY", key="dates")
+
+        selection_key = (tuple(selected_users), start, end)
+        perf.context["member"] = ", ".join(selected_users) or "Overall"
+        perf.context["dates"] = f"{start}..{end}"
+        with perf.stage("selection") as record:
+            stats = get_selection_cache().get_or_create(
+                (chat_key, "counts", INDEX_VERSION, *selection_key),
+                lambda: selection_stats(df_all, user_index, selected_users, start, end),
+            )
+            record["rows"] = stats["messages"]
+        bounds = date_slice(df_all["Date"].to_numpy(), start, end)
+
+        def text_stats():
+            """The selection's stats with sentiment, words and emojis counted."""
+            with perf.stage("enrich chat") as record, perf.activate(), \
+                    st.spinner("Scoring sentiment, words and emojis..."):
+                df_text, text_index = enriched_chat()
+                record["rows"] = len(df_text)
+            with perf.stage("selection: text") as record:
+                selection = get_selection_cache().get_or_create(
+                    (chat_key, sentiment_backend, INDEX_VERSION, *selection_key),
+                    lambda: selection_stats(df_text, text_index, selected_users, start, end),
+                )
+                record["rows"] = selection["messages"]
+            return selection
+
+        if not selected_users:
+            st.header("👥 Overall Group Analysis")
         else:
-            st.info("No emojis found")
-
-    with right:
-        st.subheader("📅 Most Active Day")
-        day_counts = df["DayName"].value_counts()
-        st.success(f"🔥 {day_counts.idxmax()} ({day_counts.max()} messages)")
-        st.bar_chart(day_counts)
-
-
-    left, right = st.columns(2)
-    with left:
-        st.subheader("🗓️ Most Active Month")
-        month_counts = df["MonthName"].value_counts()
-        st.success(f"🔥 {month_counts.idxmax()} ({month_counts.max()} messages)")
-        st.bar_chart(month_counts)
-
-    with right:
-        st.subheader("📄 Chat Preview")
-        df["Message"] = df["Message"].str.lower().str.strip()
-
-        df = df[
-            (df["Message"] != "") &
-            (~df["Message"].isin([
-                "this message was deleted",
-                "message deleted",
-                "<media omitted>",
-                "media omitted"
-            ]))
-        ]
-        df = df[::-1]
-        df_preview = df.copy()
-        df_preview.index = range(1, len(df_preview) + 1)
-        st.dataframe(df_preview)
+            st.header(f"{'👤' if len(selected_users) == 1 else '👥'} Analysis for: {', '.join(selected_users)}")
+        if (start, end) != (first_date, last_date):
+            st.caption(f"📆 {start:%d %b %Y} – {end:%d %b %Y}")
+
+        if not stats["messages"]:
+            st.warning("No messages from the selected members in these dates")
+            st.stop()
+
+        # ------------------ METRICS ------------------
+        # Read straight from the user index (or the selection's counts), so they
+        # paint right after parsing
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Total Messages", stats["messages"])
+        col2.metric("Active Days", stats["active_days"])
+        col3.metric("Avg Messages / Day", round(stats["messages"] / stats["active_days"], 2))
+
+        # ------------------ PANELS ------------------
+        # Only the open tab runs (on_change="rerun" makes `.open` track the
+        # selection); within a tab the cheap counts render before the heavy
+        # images and tables.
+        (activity_tab, members_tab, conversations_tab, sentiment_tab, words_tab, emoji_tab, preview_tab,
+         search_tab) = st.tabs(
+            ["📅 Activity", "👥 Members", "💬 Conversations", "🧠 Sentiment", "☁️ Words", "😄 Emojis",
+             "📄 Chat Preview", "🔍 Search"],
+            key="panel", on_change="rerun",
+        )
+
+        if activity_tab.open:
+            with activity_tab:
+                with perf.stage("timeline: render"):
+                    st.subheader("📈 Activity Timeline")
+                    period = st.radio("Messages per", list(TIMELINE_PERIODS), horizontal=True, key="timeline_period")
+                    if period == "Day":
+                        st.line_chart(stats["timeline"])
+                    else:
+                        st.line_chart(stats["activity"].resample(TIMELINE_PERIODS[period]))
+
+                left, right = st.columns(2)
+
+                with left, perf.stage("active day: render"):
+                    st.subheader("📅 Most Active Day")
+                    day_counts = stats["days"]
+                    st.success(f"🔥 {day_counts.idxmax()} ({day_counts.max()} messages)")
+                    st.bar_chart(day_counts)
+
+                with right, perf.stage("active month: render"):
+                    st.subheader("🗓️ Most Active Month")
+                    month_counts = stats["months"]
+                    st.success(f"🔥 {month_counts.idxmax()} ({month_counts.max()} messages)")
+                    st.bar_chart(month_counts)
+
+                # ------------------ HOUR × WEEKDAY ------------------
+                with perf.stage("heatmap: render"):
+                    st.subheader("🕒 Activity by Hour and Weekday")
+                    heatmap = stats["heatmap"].stack().rename("Messages").reset_index()
+                    st.vega_lite_chart(heatmap, {
+                        "mark": {"type": "rect", "tooltip": True},
+                        "encoding": {
+                            "x": {"field": "Hour", "type": "ordinal"},
+                            "y": {"field": "DayName", "type": "ordinal", "sort": DAY_NAMES, "title": None},
+                            "color": {"field": "Messages", "type": "quantitative"},
+                        },
+                    }, width="stretch")
+
+        if members_tab.open:
+            with members_tab:
+                left, right = st.columns(2)
+
+                with left, perf.stage("messages per user: render"):
+                    st.subheader("📌 Messages per User")
+                    data = stats["users"]
+                    st.bar_chart(data)
+
+                with right, perf.stage("pie chart: render"), st.spinner("Drawing chart..."):
+                    st.subheader("🥧 Member Activity Distribution")
+                    st.image(render_png((chat_key, selection_key, "pie", (6.4, 4.8)), lambda: draw_pie(data)),
+                             width="stretch")
+
+                # 📊 Busiest members side by side, from the same activity cube
+                with perf.stage("members over time: render"):
+                    st.subheader("📊 Members Over Time")
+                    period = st.radio("Messages per", list(TIMELINE_PERIODS)[1:], horizontal=True,
+                                      key="members_period")
+                    by_member = stats["activity"].resample(TIMELINE_PERIODS[period], by_user=True)
+                    st.line_chart(by_member[stats["users"].index[:COMPARED_MEMBERS]])
+
+        if conversations_tab.open:
+            with conversations_tab:
+                gap = st.select_slider("New conversation after a silence of (minutes)", SESSION_GAPS,
+                                       value=SESSION_GAP, key="session_gap")
+                with perf.stage("conversations: analyze", rows=bounds[1] - bounds[0]):
+                    # Only the messages in the date range, which is one slice of the chat
+                    conversations = get_conversation_cache().get_or_create(
+                        f"{chat_key}-{gap}-{bounds[0]}-{bounds[1]}",
+                        lambda: Conversations.from_frame(df_all.iloc[slice(*bounds)], gap))
+                    talk = conversations.summary(selected_users)
+
+                col1, col2, col3 = st.columns(3)
+                if not selected_users:
+                    col1.metric("Conversations", talk["sessions"])
+                    col2.metric("Avg Messages / Conversation", round(talk["messages_per_session"], 1))
+                else:
+                    col1.metric("Conversations Joined", talk["sessions"])
+                    col2.metric("Conversations Started", talk["started"])
+                reply = talk["median_reply_minutes"]
+                col3.metric("Median Reply Time", "–" if reply is None else f"{reply:.1f} min")
+
+                left, right = st.columns(2)
+
+                with left, perf.stage("conversation starters: render"):
+                    if not selected_users:
+                        st.subheader("🚀 Conversation Starters")
+                        st.bar_chart(talk["starters"])
+                    else:
+                        st.subheader("🔁 Replies To")
+                        if len(talk["replies_to"]):
+                            st.bar_chart(talk["replies_to"])
+                        else:
+                            st.info("No replies found")
+
+                with right, perf.stage("reply times: render"):
+                    st.subheader("⏱️ Reply Times")
+                    st.bar_chart(talk["response_buckets"])
+
+                # ------------------ WHO REPLIES TO WHOM ------------------
+                if not selected_users:
+                    with perf.stage("response times: render"):
+                        st.subheader("⚡ Response Time by Member (minutes)")
+                        st.dataframe(talk["response_times"].round(1), width="stretch")
+
+                    with perf.stage("reply matrix: render"):
+                        st.subheader("🔁 Who Replies to Whom")
+                        matrix = talk["reply_matrix"]
+                        active = (matrix.sum(axis=1) + matrix.sum(axis=0)) > 0
+                        pairs = matrix.loc[active, active].stack().rename("Replies").reset_index()
+                        st.vega_lite_chart(pairs, {
+                            "mark": {"type": "rect", "tooltip": True},
+                            "encoding": {
+                                "x": {"field": "To", "type": "nominal"},
+                                "y": {"field": "User", "type": "nominal", "title": "Reply from"},
+                                "color": {"field": "Replies", "type": "quantitative"},
+                            },
+                        }, width="stretch")
+                elif len(talk["replied_by"]):
+                    with perf.stage("replied by: render"):
+                        st.subheader("💬 Replied To By")
+                        st.bar_chart(talk["replied_by"])
+
+                with perf.stage("conversations: render"):
+                    st.subheader("🗂️ Longest Conversations")
+                    longest = talk["session_table"].nlargest(TOP_CONVERSATIONS, "Messages", keep="first")
+                    st.dataframe(longest.round({"Minutes": 1}), hide_index=True, width="stretch")
+
+        if sentiment_tab.open:
+            with sentiment_tab:
+                text = text_stats()
+                with perf.stage("sentiment: render"):
+                    st.subheader("🧠 Sentiment Distribution")
+                    st.bar_chart(text["sentiment"])
+
+        if words_tab.open:
+            with words_tab:
+                text = text_stats()
+
+                # ------------------ COMMON WORDS ------------------
+                with perf.stage("common words: aggregate", rows=len(text["words"])):
+                    df_common = pd.DataFrame(text["words"], columns=["Word", "Count"])
+
+                    # 🔥 START INDEX FROM 1
+                    df_common.index = range(1, len(df_common) + 1)
+
+                # ------------------ WORD CLOUD ------------------
+                # Fed from the same word-frequency table as "Most Common Words", minus
+                # WordCloud's own stop words.
+                with perf.stage("word cloud: aggregate", rows=len(text["word_freq"])):
+                    from wordcloud import STOPWORDS
+
+                    cloud_words = {
+                        word: count for word, count in text["word_freq"].items()
+                        if word not in STOPWORDS
+                    }
+
+                left, right = st.columns(2)
+
+                with right, perf.stage("common words: render"):
+                    st.subheader("📝 Most Common Words")
+                    st.table(df_common)
+
+                with left, perf.stage("word cloud: render", rows=len(cloud_words)):
+                    st.subheader("☁️ Word Cloud")
+                    if cloud_words:
+                        with st.spinner("Drawing word cloud..."):
+                            png = render_png((chat_key, selection_key, "word_cloud", (850, 400)),
+                                             lambda: draw_word_cloud(cloud_words, 850, 400))
+                        st.image(png, width="stretch")
+                    else:
+                        st.info("No words found")
+
+        if emoji_tab.open:
+            with emoji_tab:
+                text = text_stats()
+                with perf.stage("emojis: render"):
+                    st.subheader("😄 Emoji Analysis")
+                    if text["emojis"]:
+                        df_common1=pd.DataFrame(text["emojis"],
+                                            columns=["Emoji", "Count"])
+                        df_common1.index = range(1, len(df_common1) + 1)
+                        st.table(df_common1)
+                    else:
+                        st.info("No emojis found")
+
+        if preview_tab.open:
+            with preview_tab:
+                st.subheader("📄 Chat Preview")
+                # Only one page of rows is taken from the chat and sent to the browser
+                size_col, date_col, _ = st.columns([1, 1, 2])
+                page_size = size_col.selectbox("Rows per page", PREVIEW_PAGE_SIZES, index=1, key="preview_size")
+                jump = date_col.date_input("Jump to date", value=None, key="preview_date",
+                                           min_value=start, max_value=end)
+
+                with perf.stage("preview: filter") as record:
+                    visible = get_preview_cache().get_or_create(chat_key, lambda: preview_mask(df_all))
+                    rows = preview_rows(stats["rows"], visible)
+                    record["rows"] = len(rows)
+
+                pages = max(1, -(-len(rows) // page_size))
+                if jump is not None and jump != st.session_state.get("preview_jumped"):
+                    st.session_state["preview_page"] = page_of_date(
+                        df_all["Date"].to_numpy(), rows, jump, page_size) + 1
+                st.session_state["preview_jumped"] = jump
+                # Filters may have shrunk the page count since the last rerun
+                st.session_state["preview_page"] = min(st.session_state.get("preview_page", 1), pages)
+                page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, key="preview_page")
+
+                if len(rows):
+                    # Newest first: page 1 ends with the last message
+                    page_end = len(rows) - (page - 1) * page_size
+                    page_start = max(page_end - page_size, 0)
+                    with perf.stage("preview: render", rows=page_end - page_start):
+                        df_preview = df_all.iloc[rows[page_start:page_end][::-1]]
+                        df_preview = df_preview.drop(columns=["Emojis", "Words"], errors="ignore")
+                        df_preview.index = range((page - 1) * page_size + 1, (page - 1) * page_size + len(df_preview) + 1)
+                        st.dataframe(df_preview)
+                    st.caption(f"Messages {(page - 1) * page_size + 1:,}–{(page - 1) * page_size + page_end - page_start:,} "
+                               f"of {len(rows):,}, newest first")
+                else:
+                    st.info("No messages to preview")
+
+        if search_tab.open:
+            with search_tab:
+                st.subheader("🔍 Search Messages")
+                # Searches the selected members and dates
+                query = st.text_input('Words or "a phrase"', key="search_query")
+
+                if query.strip():
+                    with perf.stage("search: index") as record:
+                        search_index = get_search_cache().get_or_create(
+                            f"{chat_key}-v{INDEX_VERSION}-s{SEARCH_VERSION}", lambda: SearchIndex.from_frame(df_all))
+                        record["rows"] = len(df_all)
+                    with perf.stage("search: query") as record:
+                        found = search_index.search(df_all, query, rows=stats["rows"])
+                        record["rows"] = len(found)
+
+                    if len(found):
+                        st.caption(f"{len(found):,} message{'s' if len(found) != 1 else ''} found"
+                                   + (f", newest {SEARCH_RESULTS} shown" if len(found) > SEARCH_RESULTS else ""))
+                        results = df_all.iloc[found[-SEARCH_RESULTS:][::-1]]
+                        st.dataframe(results.drop(columns=["Emojis", "Words"], errors="ignore"), hide_index=True)
+                    else:
+                        st.info("No messages found")
+    finally:
+        perf.finish()
+
+    # ------------------ PERFORMANCE ------------------
+    performance = st.expander("⏱️ Performance", key="performance", on_change="rerun")
+    if performance.open:
+        with performance:
+            timings = pd.DataFrame(perf.records, columns=["stage", "depth", "rows", "wall_s", "cpu_s", "mem_mb"])
+            timings["stage"] = ["\u2003" * depth + name for depth, name in zip(timings.pop("depth"), timings["stage"])]
+            timings["rows"] = timings["rows"].astype("Int64")
+            timings["wall ms"] = timings.pop("wall_s") * 1000
+            timings["cpu ms"] = timings.pop("cpu_s") * 1000
+            timings["memory Δ MB"] = timings.pop("mem_mb")
+            st.dataframe(timings.set_index("stage").round(1), width="stretch")
+            st.caption("Nested stages are indented. Memory Δ is the change in process RSS. "
+                       "Set ANALYZER_PROFILE to a .jsonl file (or .prof for cProfile) to save these runs.")
 
 
 else:
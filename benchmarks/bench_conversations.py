@@ -0,0 +1,65 @@
+"""Conversation analytics: row-by-row loop vs the vectorized single pass.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_conversations [--messages 10000 1000000]
+
+"loop" walks the time-sorted messages in Python, tracking the open
+session and the previous sender (the straightforward implementation);
+"vectorized" is `Conversations.from_frame`. Both derive sessions and
+reply latencies, which are checked for equality.
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from chat_parser import parse_chat
+from conversations import SESSION_GAP, Conversations
+
+from benchmarks.common import best_of
+from benchmarks.synthetic import write_chat
+
+
+def loop(df, gap=SESSION_GAP):
+    """(messages per session, reply latencies in seconds) from a Python loop."""
+    timed = df[df["Timestamp"].notna()].sort_values("Timestamp", kind="stable")
+    seconds = timed["Timestamp"].to_numpy().astype("datetime64[s]").astype(np.int64).tolist()
+    sessions, replies = [], []
+    previous = None
+    for second, user in zip(seconds, timed["User"].tolist()):
+        if previous is None or second - previous[0] > gap * 60:
+            sessions.append(1)
+        else:
+            sessions[-1] += 1
+            if user != previous[1]:
+                replies.append(second - previous[0])
+        previous = (second, user)
+    return sessions, replies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--users", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'messages':>10}{'sessions':>10}{'replies':>10}{'loop s':>9}{'vector s':>10}{'speedup':>9}  same")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.messages:
+            path = os.path.join(tmp, f"chat_{size}.txt")
+            write_chat(path, size, users=args.users)
+            df = parse_chat(path)
+
+            vector, conversations = best_of(Conversations.from_frame, df, runs=1)
+            sessions, replies = len(conversations.sessions["start"]), len(conversations.replies["seconds"])
+            row = f"{len(df):>10,}{sessions:>10,}{replies:>10,}"
+            slow, (sessions, replies) = best_of(loop, df, runs=1)
+            same = (np.array_equal(sessions, conversations.sessions["messages"])
+                    and np.array_equal(replies, conversations.replies["seconds"]))
+            print(f"{row}{slow:>9.3f}{vector:>10.3f}{slow / vector:>8.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
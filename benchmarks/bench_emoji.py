@@ -0,0 +1,59 @@
+"""Emoji extraction: per-character EMOJI_DATA scan vs the compiled matcher.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_emoji [chat.txt] [--repeat 50]
+"""
+import argparse
+import io
+from collections import Counter
+
+import emoji
+
+from chat_parser import parse_chat
+from text_features import count_emojis, emoji_pattern
+
+from benchmarks.common import best_of
+
+
+def extract_emojis_per_char(text):
+    # The original implementation, kept here as the baseline
+    return [c for c in text if c in emoji.EMOJI_DATA]
+
+
+def count_per_char(messages):
+    emojis = []
+    for msg in messages:
+        emojis.extend(extract_emojis_per_char(msg))
+    return Counter(emojis)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("chat", nargs="?", default="chat1.txt")
+    parser.add_argument("--repeat", type=int, default=50,
+                        help="concatenate the parsed messages this many times")
+    args = parser.parse_args()
+
+    with open(args.chat, "rb") as f:
+        messages = parse_chat(io.BytesIO(f.read()))["Message"].tolist() * args.repeat
+    chars = sum(map(len, messages))
+
+    build, _ = best_of(emoji_pattern, runs=1)
+
+    old_time, old = best_of(count_per_char, messages)
+    new_time, new = best_of(count_emojis, messages)
+
+    print(f"{len(messages):,} messages, {chars:,} characters")
+    print(f"matcher build:     {build * 1000:8.1f} ms (once per process)")
+    print(f"per-char scan:     {old_time * 1000:8.1f} ms  {sum(old.values()):,} emojis")
+    print(f"compiled matcher:  {new_time * 1000:8.1f} ms  {sum(new.values()):,} emojis")
+    print(f"speedup:           {old_time / new_time:8.1f}x")
+
+    multi = {e: n for e, n in new.items() if len(e) > 1}
+    print(f"multi-codepoint emojis the per-char scan split up: {sum(multi.values()):,}"
+          f" ({len(multi)} distinct)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""App startup imports: `-X importtime` breakdown by package.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_import [--runs 5] [--top 15]
+
+Imports everything `app.py` imports at module level in a fresh
+interpreter (median of `--runs`) and lists the packages that take the
+longest. The packages the app loads on first use (plotting, NLP, emoji
+data) are timed separately, each on top of the startup imports, so
+the table shows what a cold start no longer waits for.
+"""
+import argparse
+import ast
+import subprocess
+import sys
+from collections import Counter
+
+import numpy as np
+
+APP = "app.py"
+DEFERRED = ("matplotlib.pyplot", "wordcloud", "textblob", "nltk", "emoji")
+
+
+def startup_imports(path=APP):
+    """Modules imported at the top level of a script (not inside functions)."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def import_times(modules, preloaded=()):
+    """{top-level package: self microseconds} for importing `modules` after `preloaded`."""
+    code = "".join(f"import {name}\n" for name in preloaded)
+    code += "import sys; print('-- timed --', file=sys.stderr, flush=True)\n"
+    code += "".join(f"import {name}\n" for name in modules)
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True
+    ).stderr
+    # "import time: self [us] | cumulative | imported package"
+    times = Counter()
+    for line in stderr.split("-- timed --", 1)[-1].splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        times[name.strip().split(".")[0]] += int(own)
+    return times
+
+
+def median_times(modules, preloaded=(), runs=5):
+    samples = [import_times(modules, preloaded) for _ in range(runs)]
+    packages = set().union(*samples)
+    return {package: float(np.median([sample[package] for sample in samples])) for package in packages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=15, help="packages to list")
+    args = parser.parse_args()
+
+    modules = startup_imports()
+    # Warm the bytecode cache so the first run is not an outlier
+    import_times(modules)
+    startup = median_times(modules, runs=args.runs)
+    print(f"startup imports of {APP}: {sum(startup.values()) / 1000:.0f} ms")
+    print(f"{'package':<24}{'ms':>9}")
+    for package, us in sorted(startup.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<24}{us / 1000:>9.1f}")
+
+    print("\nloaded on first use (on top of the startup imports):")
+    for name in DEFERRED:
+        extra = median_times([name], preloaded=modules, runs=args.runs)
+        print(f"{name:<24}{sum(extra.values()) / 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Memory per million messages: old string layout vs the compact parsed layout.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_memory [chat.txt] [--messages 1000000]
+"""
+import argparse
+
+import pandas as pd
+import pyarrow as pa
+
+from chat_parser import COLUMNS, build_frame, split_chat
+from pipeline import prepare
+
+
+def old_layout(df, times, strings):
+    """The layout before categoricals/Timestamp: every text column as `strings`."""
+    return pd.DataFrame({
+        "Date": df["Date"],
+        "Time": times.astype(strings),
+        "User": df["User"].astype(strings),
+        "Message": df["Message"].astype(strings),
+        "Sentiment": df["Sentiment"].astype(strings),
+        "Emojis": df["Emojis"],
+        "Words": df["Words"],
+        "DayName": df["DayName"].astype(strings),
+        "MonthName": df["MonthName"].astype(strings),
+    })
+
+
+def per_million(df):
+    usage = df.memory_usage(deep=True, index=False)
+    return usage * 1_000_000 / len(df) / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("chat", nargs="?", default="chat1.txt")
+    parser.add_argument("--messages", type=int, default=1_000_000,
+                        help="repeat the chat until it has about this many messages")
+    args = parser.parse_args()
+
+    with open(args.chat, "rb") as f:
+        data = f.read()
+    per_copy = len(build_frame(split_chat(data)))
+    messages = split_chat(data * max(1, round(args.messages / per_copy)))
+
+    df = prepare(build_frame(messages))
+    raw = messages.to_pandas() if isinstance(messages, pa.Table) else pd.DataFrame(messages, columns=COLUMNS)
+    times = raw["Time"].loc[df.index]
+
+    layouts = {
+        "object": per_million(old_layout(df, times, object)),
+        "str": per_million(old_layout(df, times, "str")),
+        "compact": per_million(df),
+    }
+    table = pd.DataFrame(layouts).fillna(0)
+    table.loc["total"] = table.sum()
+
+    print(f"{len(df):,} messages; MB per million messages")
+    print("object  = old layout, text as Python strings (pandas < 3 default)")
+    print("str     = old layout, text as pandas' default string dtype")
+    print("compact = parser output: categoricals + Timestamp, no Time strings")
+    print(table.round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Chat parsing: decoded lines through `re` vs the memory-mapped Arrow parser.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parse [chat.txt] [--repeat 200]
+"""
+import argparse
+import os
+import tempfile
+
+from chat_parser import build_frame, open_chat_buffer, split_chat, split_messages
+
+from benchmarks.common import best_of, traced
+
+
+def parse_lines(path):
+    # Whole-text decode + one Python string and match per line
+    with open(path, "rb") as f:
+        return build_frame(split_messages(f.read().decode("utf-8", errors="ignore")))
+
+
+def parse_buffer(path):
+    return build_frame(split_chat(open_chat_buffer(path)))
+
+
+def measure(func, path, runs=3):
+    best, df = best_of(func, path, runs=runs)
+    del df
+    peak, arrow, df = traced(func, path)
+    return best, peak, arrow, len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("chat", nargs="?", default="chat1.txt")
+    parser.add_argument("--repeat", type=int, default=200,
+                        help="concatenate the chat this many times")
+    args = parser.parse_args()
+
+    with open(args.chat, "rb") as f:
+        data = f.read() * args.repeat
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "chat.txt")
+        with open(path, "wb") as f:
+            f.write(data)
+
+        print(f"{len(data) / 1024 ** 2:.1f} MB export")
+        print(f"{'parser':<14}{'seconds':>9}{'py peak MB':>12}{'arrow MB':>10}{'messages':>10}")
+        for name, func in [("re lines", parse_lines), ("arrow buffer", parse_buffer)]:
+            seconds, peak, arrow, rows = measure(func, path)
+            print(f"{name:<14}{seconds:>9.3f}{peak / 1024 ** 2:>12.1f}"
+                  f"{arrow / 1024 ** 2:>10.1f}{rows:>10,}")
+
+
+if __name__ == "__main__":
+    main()
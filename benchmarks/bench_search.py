@@ -0,0 +1,55 @@
+"""Message search: `str.contains` scan vs the inverted index.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_search [--messages 1000000]
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from chat_parser import parse_chat
+from search import SearchIndex, part_pattern
+
+from benchmarks.common import best_of, median_of
+from benchmarks.synthetic import write_chat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "chat.txt")
+        write_chat(path, args.messages, users=20)
+        df = parse_chat(path)
+    build, search = best_of(SearchIndex.from_frame, df, runs=1)
+    print(f"{len(df):,} messages, {len(search.vocabulary):,} words")
+    print(f"index build: {build:.2f}s, {search.nbytes / 1024 ** 2:.1f} MB")
+
+    member_rows = np.flatnonzero((df["User"] == df["User"].iloc[0]).to_numpy())
+    dates = df["Date"].drop_duplicates()
+    first, last = dates.iloc[len(dates) // 3], dates.iloc[len(dates) // 3 + 30]
+    queries = [
+        ("term", "terrible", {}),
+        ("two terms", "exam tomorrow", {}),
+        ("phrase", '"exam tomorrow"', {}),
+        ("term + member", "happy", {"rows": member_rows}),
+        ("term + 30 days", "happy", {"start": first, "end": last}),
+    ]
+
+    print(f"{'query':<16}{'matches':>10}{'scan ms':>10}{'index ms':>10}")
+    messages = df["Message"]
+    for name, query, filters in queries:
+        needle = query.strip('"').split()[0]
+        pattern = part_pattern(needle)
+        scan, _ = median_of(lambda: np.flatnonzero(messages.str.contains(pattern).to_numpy()), runs=3)
+        indexed, found = median_of(lambda: search.search(df, query, **filters))
+        print(f"{name:<16}{len(found):>10,}{scan * 1000:>10.1f}{indexed * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Member / date filters: boolean masks vs sorted-index slices.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_selection [--messages 1000000]
+
+"mask" is the straightforward filter: a boolean mask over every message
+for the members and the dates, then the panel stats counted from the
+masked rows. "sliced" is `selection_stats`: the members' row positions
+from the user index, the date range found by binary search, and the
+stats merged from the precomputed ones or counted from the smaller side
+of the range. Both give the same rows and message counts.
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from aggregates import ChatStats, build_user_index, member_rows, selection_stats
+from chat_parser import parse_chat
+from pipeline import prepare
+
+from benchmarks.common import best_of
+from benchmarks.synthetic import write_chat
+
+
+def masked(df, users, start, end):
+    mask = np.ones(len(df), dtype=bool)
+    if users:
+        mask &= df["User"].isin(users).to_numpy()
+    if start is not None:
+        mask &= (df["Date"] >= pd.Timestamp(start)).to_numpy() & (df["Date"] <= pd.Timestamp(end)).to_numpy()
+    rows = np.flatnonzero(mask)
+    stats = ChatStats().update(df.iloc[rows])
+    return rows, stats.summary()
+
+
+def sliced(df, index, users, start, end):
+    selection = selection_stats(df, index, users, start, end)
+    rows = selection["rows"]
+    return np.arange(len(df)) if rows is None else rows, selection
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "chat.txt")
+        write_chat(path, args.messages, users=args.users)
+        # The lexicon backend keeps the setup short; scores do not matter here
+        df = prepare(parse_chat(path), backend="lexicon")
+    index = build_user_index(df)
+
+    members = list(index["Overall"]["users"].index)
+    dates = df["Date"].dt.date.drop_duplicates().tolist()
+    month = len(dates) // 24
+    selections = [
+        ("1 member", members[:1], None, None),
+        ("3 members", members[:3], None, None),
+        ("everyone, 1 month", [], dates[len(dates) // 2], dates[len(dates) // 2 + month]),
+        ("everyone, all but 1 month", [], dates[month], dates[-1]),
+        ("3 members, 6 months", members[:3], dates[len(dates) // 4], dates[len(dates) // 4 + 6 * month]),
+    ]
+
+    print(f"{len(df):,} messages, {len(members)} members")
+    print(f"{'selection':<28}{'messages':>10}{'mask ms':>10}{'sliced ms':>11}{'speedup':>9}  same")
+    for name, users, start, end in selections:
+        slow, (mask_rows, expected) = best_of(masked, df, users, start, end, runs=args.runs)
+        fast, (rows, selection) = best_of(sliced, df, index, users, start, end, runs=args.runs)
+        same = np.array_equal(mask_rows, rows) and expected["messages"] == selection["messages"]
+        print(f"{name:<28}{len(rows):>10,}{slow * 1000:>10.1f}{fast * 1000:>11.1f}{slow / fast:>8.1f}x  {same}")
+
+    # Rows alone, as the preview and search tabs use them
+    users = members[:3]
+    slow, _ = best_of(lambda: np.flatnonzero(df["User"].isin(users).to_numpy()), runs=args.runs)
+    fast, _ = best_of(member_rows, index, users, runs=args.runs)
+    print(f"\nrows of 3 members: mask {slow * 1000:.1f} ms, index union {fast * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
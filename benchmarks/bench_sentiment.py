@@ -0,0 +1,68 @@
+"""Sentiment backends: messages/sec and label agreement with TextBlob.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sentiment [chat.txt chat1.txt] [--messages 100000]
+
+Every export is scored by each backend from a cold start; agreement is
+the share of messages whose label matches the TextBlob backend, with a
+confusion matrix of TextBlob labels (rows) against the backend's
+(columns). `--messages` also scores a synthetic export of that size.
+"""
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+
+from chat_parser import parse_chat
+from sentiment import BACKENDS, SENTIMENT_LABELS, SentimentEngine, get_backend, get_polarity
+
+from benchmarks.synthetic import write_chat
+
+EXPORTS = ("chat.txt", "chat1.txt")
+
+
+def score(messages, backend):
+    get_polarity.cache_clear()
+    engine = SentimentEngine(backend=backend)
+    labels = engine.score(messages)
+    return labels, engine.stats["messages_per_sec"]
+
+
+def report(name, messages):
+    print(f"\n{name}: {len(messages):,} messages ({messages.nunique():,} unique)")
+    print(f"{'backend':<10}{'messages/sec':>14}{'agreement':>11}")
+    results = {backend: score(messages, backend) for backend in BACKENDS}
+    reference, _ = results["textblob"]
+    for backend, (labels, rate) in results.items():
+        agreement = (labels.to_numpy() == reference.to_numpy()).mean() if len(labels) else 1.0
+        print(f"{backend:<10}{rate:>14,.0f}{agreement:>11.1%}")
+    for backend, (labels, _) in results.items():
+        if backend != "textblob":
+            print(f"\ntextblob (rows) vs {backend} (columns):")
+            print(pd.crosstab(reference.rename("textblob"), labels.rename(backend), dropna=False).reindex(
+                index=SENTIMENT_LABELS, columns=SENTIMENT_LABELS, fill_value=0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("exports", nargs="*", default=[path for path in EXPORTS if os.path.exists(path)])
+    parser.add_argument("--messages", type=int, default=0, help="also score a synthetic export of this size")
+    args = parser.parse_args()
+
+    # Lexicon loading and regex compiling are one-off setup, not scoring
+    for backend in BACKENDS:
+        get_backend(backend).polarities(["warm up"])
+
+    for path in args.exports:
+        report(path, parse_chat(path)["Message"])
+    if args.messages:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "chat.txt")
+            write_chat(path, args.messages)
+            report(f"synthetic {args.messages:,}", parse_chat(path)["Message"])
+
+
+if __name__ == "__main__":
+    main()
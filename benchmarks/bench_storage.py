@@ -0,0 +1,58 @@
+"""Parsed-chat storage: CSV (parsed_chat.csv style) vs Parquet vs Feather.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_storage [chat.txt] [--repeat 200]
+"""
+import argparse
+import io
+import os
+import tempfile
+
+import pandas as pd
+
+from chat_parser import parse_chat
+from pipeline import enrich
+from storage import load_chat_file, save_chat
+
+from benchmarks.common import best_of
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("chat", nargs="?", default="chat1.txt")
+    parser.add_argument("--repeat", type=int, default=200,
+                        help="concatenate the parsed chat this many times")
+    args = parser.parse_args()
+
+    with open(args.chat, "rb") as f:
+        df = enrich(parse_chat(io.BytesIO(f.read())))
+    df = pd.concat([df] * args.repeat, ignore_index=True)
+    print(f"{len(df):,} messages")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "chat.csv")
+        csv_columns = ["Date", "Timestamp", "User", "Message", "Sentiment"]
+        df[csv_columns].to_csv(csv_path, index=False)
+
+        paths = {"csv": csv_path}
+        for fmt in ("parquet", "feather"):
+            paths[fmt] = os.path.join(tmp, f"chat.{fmt}")
+            save_chat(df, paths[fmt])
+
+        loaders = {
+            "csv": lambda columns=None: pd.read_csv(paths["csv"], usecols=columns),
+            "parquet": lambda columns=None: load_chat_file(paths["parquet"], columns),
+            "feather": lambda columns=None: load_chat_file(paths["feather"], columns),
+        }
+
+        print(f"{'format':<8} {'size MB':>9} {'load all s':>11} {'User+Sentiment s':>17}")
+        for fmt, load in loaders.items():
+            size = os.path.getsize(paths[fmt]) / 1024 ** 2
+            full, _ = best_of(load)
+            subset, _ = best_of(lambda: load(["User", "Sentiment"]))
+            print(f"{fmt:<8} {size:9.2f} {full:11.3f} {subset:17.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Stage timings and peak memory on synthetic chats, written as JSON.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_suite --sizes 10000 100000 --out before.json
+    python -m benchmarks.bench_suite --sizes 10000 100000 --out after.json --compare before.json
+
+Each size gets a generated export (see `benchmarks.synthetic`) that goes
+through the same stages the app runs: parse, sentiment, emoji
+extraction, tokenization and aggregation. Peak memory is the traced
+Python/NumPy peak of a second run of each stage plus the Arrow memory
+its result still holds.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+
+import pandas as pd
+
+from aggregates import build_user_index
+from chat_parser import parse_chat
+from pipeline import init_worker
+from profiling import peak_rss_bytes
+from sentiment import SentimentEngine, get_polarity
+from text_features import emoji_pattern, extract_emojis, extract_words
+
+from benchmarks.common import best_of, traced
+from benchmarks.synthetic import add_arguments, generator_options, write_chat
+
+SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+STAGES = ("parse", "sentiment", "emojis", "words", "aggregate")
+PACKAGES = ("numpy", "pandas", "pyarrow", "textblob", "emoji")
+
+
+# ------------------ STAGES ------------------
+def score_sentiment(messages):
+    # Start cold: the polarity memo would otherwise carry over between runs
+    get_polarity.cache_clear()
+    return SentimentEngine().score(messages)
+
+
+def emoji_lists(messages):
+    return [tuple(extract_emojis(msg)) for msg in messages]
+
+
+def word_lists(messages):
+    return [extract_words(msg) for msg in messages]
+
+
+def measure(func, *args, runs=1, memory=True):
+    """(stats, result): best of `runs` timings, then one traced run for memory."""
+    best, result = best_of(func, *args, runs=runs)
+    stats = {"seconds": round(best, 4)}
+
+    if memory:
+        del result
+        peak, arrow, result = traced(func, *args)
+        stats["peak_mb"] = round(peak / 1024 ** 2, 1)
+        stats["arrow_mb"] = round(arrow / 1024 ** 2, 1)
+    return stats, result
+
+
+def run_size(path, stages, runs=1, memory=True):
+    """Stage stats for one export; `parse` always runs since the rest need its output."""
+    results = {}
+    stats, df = measure(parse_chat, path, runs=runs, memory=memory)
+    if "parse" in stages:
+        results["parse"] = stats
+
+    messages = df["Message"].tolist()
+    enriched = {}
+    for stage, func, column in [
+        ("sentiment", score_sentiment, "Sentiment"),
+        ("emojis", emoji_lists, "Emojis"),
+        ("words", word_lists, "Words"),
+    ]:
+        if stage in stages or "aggregate" in stages:
+            stats, enriched[column] = measure(
+                func, df["Message"] if column == "Sentiment" else messages, runs=runs, memory=memory
+            )
+            if stage in stages:
+                results[stage] = stats
+
+    if "aggregate" in stages:
+        df["Sentiment"] = enriched["Sentiment"]
+        df["Emojis"] = pd.Series(enriched["Emojis"], index=df.index, dtype=object)
+        df["Words"] = pd.Series(enriched["Words"], index=df.index, dtype=object)
+        results["aggregate"], _ = measure(build_user_index, df, runs=runs, memory=memory)
+    return len(df), results
+
+
+# ------------------ REPORT ------------------
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    packages = {}
+    for name in PACKAGES:
+        try:
+            packages[name] = version(name)
+        except PackageNotFoundError:
+            packages[name] = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "packages": packages,
+    }
+
+
+def max_rss_mb():
+    peak = peak_rss_bytes()
+    return None if peak is None else round(peak / 1024 ** 2, 1)
+
+
+def compare(report, baseline):
+    """Print seconds and peak memory of `report` against an earlier report."""
+    old = {(size["messages"], stage): stats
+           for size in baseline["sizes"] for stage, stats in size["stages"].items()}
+    print(f"\nvs {baseline['environment'].get('commit')}:")
+    print(f"{'messages':>10}  {'stage':<10}{'old s':>9}{'new s':>9}{'ratio':>7}{'old MB':>9}{'new MB':>9}")
+    for size in report["sizes"]:
+        for stage, stats in size["stages"].items():
+            before = old.get((size["messages"], stage))
+            if before is None:
+                continue
+            ratio = stats["seconds"] / before["seconds"] if before["seconds"] else float("inf")
+            print(f"{size['messages']:>10,}  {stage:<10}{before['seconds']:>9.3f}{stats['seconds']:>9.3f}"
+                  f"{ratio:>7.2f}{before.get('peak_mb', float('nan')):>9.1f}"
+                  f"{stats.get('peak_mb', float('nan')):>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES),
+                        help="messages per generated export (default: 10k 100k 1M 10M)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--runs", type=int, default=1, help="timed runs per stage; the best is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced memory runs")
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    # One-off setup (TextBlob lexicon, emoji matcher) is not part of any stage
+    init_worker()
+    emoji_pattern()
+
+    options = generator_options(args)
+    report = {"environment": environment(), "generator": options, "sizes": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"chat_{size}.txt")
+            file_bytes = write_chat(path, size, **options)
+            parsed, stages = run_size(path, args.stages, args.runs, not args.no_memory)
+            report["sizes"].append({
+                "messages": size,
+                "file_mb": round(file_bytes / 1024 ** 2, 1),
+                "parsed_messages": parsed,
+                "stages": stages,
+                "max_rss_mb": max_rss_mb(),
+            })
+            print(f"{size:,} messages: " + ", ".join(
+                f"{stage} {stats['seconds']:.2f}s" for stage, stats in stages.items()
+            ), file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
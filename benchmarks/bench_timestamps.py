@@ -0,0 +1,65 @@
+"""Timestamp parsing: inferred per-column parse vs the detected explicit format.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_timestamps [--messages 1000000]
+
+For every header style (12h / 24h clock, 2- / 4-digit year) a synthetic
+export is split once, then its Date and Time columns are parsed both
+ways. "inferred" is the previous stage: `pd.to_datetime` with the format
+pandas infers from the first date ("mixed", i.e. dateutil per value,
+when it cannot infer one, as for 2-digit years) plus a regex pass over
+the times. "detected" is `parse_timestamps`.
+"""
+import argparse
+import os
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from chat_parser import open_chat_buffer, parse_timestamps, split_chat, time_of_day
+
+from benchmarks.common import best_of
+from benchmarks.synthetic import CLOCKS, YEAR_DIGITS, write_chat
+
+
+def inferred(dates, times):
+    date_format = guess_datetime_format(dates.iloc[0], dayfirst=True) or "mixed"
+    with warnings.catch_warnings():
+        # "Could not infer format" for the dateutil fallback
+        warnings.simplefilter("ignore", UserWarning)
+        parsed = pd.to_datetime(dates, format=date_format, dayfirst=True, errors="coerce")
+    parsed = parsed.dt.normalize().astype("datetime64[s]")
+    return parsed, parsed + time_of_day(times)
+
+
+def detected(dates, times):
+    return parse_timestamps(dates, times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'clock':<7}{'year':>5}{'inferred s':>12}{'detected s':>12}{'speedup':>9}  same")
+    with tempfile.TemporaryDirectory() as tmp:
+        for clock in CLOCKS:
+            for digits in YEAR_DIGITS:
+                path = os.path.join(tmp, f"chat_{clock}_{digits}.txt")
+                write_chat(path, args.messages, clock=clock, year_digits=digits)
+                messages = split_chat(open_chat_buffer(path))
+                dates, times = messages["Date"].to_pandas(), messages["Time"].to_pandas()
+
+                old, (_, old_stamps) = best_of(inferred, dates, times, runs=args.runs)
+                new, (_, new_stamps) = best_of(detected, dates, times, runs=args.runs)
+                same = np.array_equal(np.asarray(old_stamps), new_stamps, equal_nan=True)
+                print(f"{clock:<7}{digits:>5}{old:>12.3f}{new:>12.3f}{old / new:>8.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
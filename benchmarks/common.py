@@ -0,0 +1,45 @@
+"""Timing and memory helpers shared by the benchmarks."""
+import time
+import tracemalloc
+
+import numpy as np
+import pyarrow as pa
+
+
+def run_times(func, *args, runs=3):
+    """(seconds of each of `runs` calls, result of the last call)."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def best_of(func, *args, runs=3):
+    """(fastest of `runs` calls in seconds, result)."""
+    times, result = run_times(func, *args, runs=runs)
+    return min(times), result
+
+
+def median_of(func, *args, runs=7):
+    """(median of `runs` calls in seconds, result)."""
+    times, result = run_times(func, *args, runs=runs)
+    return float(np.median(times)), result
+
+
+def traced(func, *args):
+    """(peak Python bytes, Arrow bytes still held, result) of one call.
+
+    tracemalloc does not see Arrow buffers, so the Arrow memory held by
+    the result is read from the default memory pool instead.
+    """
+    pool = pa.default_memory_pool()
+    arrow_before = pool.bytes_allocated()
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak, pool.bytes_allocated() - arrow_before, result
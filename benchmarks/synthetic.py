@@ -0,0 +1,194 @@
+"""Synthetic WhatsApp exports for benchmarks.
+
+Writes an Android-style export with a chosen size and shape:
+
+    python -m benchmarks.synthetic synthetic.txt --messages 1000000 --clock 24h
+
+The same arguments and seed always give the same file.
+"""
+import argparse
+
+import numpy as np
+
+CLOCKS = ("12h", "24h")
+YEAR_DIGITS = (2, 4)
+
+FIRST_NAMES = [
+    "Ankan", "Tarash", "Aniruddha", "Subayan", "Priya", "Rahul", "Meera", "Arjun",
+    "Sneha", "Vikram", "Ananya", "Rohan", "Isha", "Kabir", "Diya", "Aarav",
+]
+
+# Casual chat words; none contains a system keyword ("left", "added", ...)
+WORDS = [
+    "ok", "haha", "yes", "no", "kal", "aaj", "ami", "tui", "kor", "ki", "hobe", "na",
+    "bhai", "class", "exam", "call", "now", "come", "later", "tomorrow", "today",
+    "where", "what", "why", "send", "photo", "link", "group", "college", "bus",
+    "good", "great", "nice", "love", "happy", "best", "awesome", "thanks",
+    "bad", "sad", "worst", "angry", "boring", "terrible", "sorry", "late",
+    "the", "and", "to", "a", "in", "of", "is", "it", "you", "me", "we", "for",
+]
+
+EMOJIS = ["😂", "❤️", "👍", "🔥", "🙏", "😭", "🎉", "🥲", "👍🏽", "👨‍👩‍👧", "🇮🇳", "🤦‍♂️"]
+
+# (has a "User: " prefix, text); {user} / {other} are member names
+SYSTEM_MESSAGES = [
+    (False, "{user} added {other}"),
+    (False, "{user} left"),
+    (False, "{user} changed the group description"),
+    (False, "{user} joined using this group's invite link"),
+    (True, "<Media omitted>"),
+    (True, "This message was deleted"),
+]
+
+# Share of messages per hour of day: quiet nights, busy evenings
+HOUR_WEIGHTS = np.array([
+    2, 1, 1, 1, 1, 1, 2, 3, 5, 6, 6, 6, 7, 6, 6, 6, 7, 8, 9, 10, 10, 9, 7, 4
+], dtype=float)
+
+
+def _names(users):
+    return [
+        FIRST_NAMES[i] if i < len(FIRST_NAMES) else f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {i}"
+        for i in range(users)
+    ]
+
+
+def _time_labels(clock):
+    """Header time for every minute of the day."""
+    labels = []
+    for minute in range(24 * 60):
+        hour, minute = divmod(minute, 60)
+        if clock == "24h":
+            labels.append(f"{hour:02d}:{minute:02d}")
+        else:
+            labels.append(f"{(hour - 1) % 12 + 1}:{minute:02d} {'am' if hour < 12 else 'pm'}")
+    return labels
+
+
+def _date_labels(start, days, year_digits):
+    """Header date (dd/mm/yy or dd/mm/yyyy) for every day from `start`."""
+    dates = np.datetime64(start, "D") + np.arange(days)
+    year_format = "%y" if year_digits == 2 else "%Y"
+    return [date.strftime(f"%d/%m/{year_format}") for date in dates.astype(object)]
+
+
+def _text(rng, length, emoji_density):
+    words = [WORDS[i] for i in rng.integers(len(WORDS), size=length)]
+    if emoji_density:
+        for position in np.flatnonzero(rng.random(length) < emoji_density)[::-1].tolist():
+            words.insert(position + 1, EMOJIS[rng.integers(len(EMOJIS))])
+    return " ".join(words)
+
+
+def generate_chat(messages=10_000, users=8, multiline=0.05, emoji_density=0.05,
+                  system=0.05, clock="12h", year_digits=2, days=730,
+                  start="2023-01-01", seed=0, chunk_size=100_000):
+    """Yield the lines of a synthetic export in chunks of `chunk_size` messages.
+
+    `messages` header lines are spread over `days` days, with more traffic
+    in the evening. Users post with Zipf-like frequencies; `multiline` is
+    the share of messages with continuation lines, `emoji_density` the
+    chance of an emoji after each word and `system` the share of system
+    lines ("X added Y", "<Media omitted>", ...) the parser drops.
+    """
+    if clock not in CLOCKS:
+        raise ValueError(f"clock must be one of {CLOCKS}")
+    if year_digits not in YEAR_DIGITS:
+        raise ValueError(f"year_digits must be one of {YEAR_DIGITS}")
+
+    rng = np.random.default_rng(seed)
+    names = _names(users)
+    user_weights = 1 / np.arange(1, users + 1)
+    user_weights /= user_weights.sum()
+    hour_weights = HOUR_WEIGHTS / HOUR_WEIGHTS.sum()
+    date_labels = _date_labels(start, days, year_digits)
+    time_labels = _time_labels(clock)
+
+    for first in range(0, messages, chunk_size):
+        count = min(chunk_size, messages - first)
+        # Each chunk covers its share of the days, so the file stays in order
+        day_lo = first * days // messages
+        day_hi = max(day_lo + 1, (first + count) * days // messages)
+        minutes = np.sort(
+            rng.integers(day_lo, day_hi, size=count) * 1440
+            + rng.choice(24, size=count, p=hour_weights) * 60
+            + rng.integers(60, size=count)
+        )
+        senders = rng.choice(users, size=count, p=user_weights)
+        others = rng.integers(users, size=count)
+        lengths = rng.geometric(0.15, size=count).clip(max=40)
+        is_system = rng.random(count) < system
+        templates = rng.integers(len(SYSTEM_MESSAGES), size=count)
+        extra_lines = np.where(rng.random(count) < multiline, rng.integers(1, 4, size=count), 0)
+
+        lines = []
+        for minute, sender, other, length, system_line, template, extra in zip(
+            minutes.tolist(), senders.tolist(), others.tolist(), lengths.tolist(),
+            is_system.tolist(), templates.tolist(), extra_lines.tolist()
+        ):
+            header = f"{date_labels[minute // 1440]}, {time_labels[minute % 1440]} - "
+            user = names[sender]
+            if system_line:
+                prefixed, text = SYSTEM_MESSAGES[template]
+                text = text.format(user=user, other=names[other])
+                lines.append(f"{header}{user}: {text}" if prefixed else header + text)
+                continue
+            lines.append(f"{header}{user}: {_text(rng, length, emoji_density)}")
+            for _ in range(extra):
+                lines.append(_text(rng, int(rng.integers(1, 12)), emoji_density))
+        yield lines
+
+
+def write_chat(path, messages=10_000, **options):
+    """Write a synthetic export (see `generate_chat`) to `path`; returns its size in bytes."""
+    size = 0
+    with open(path, "wb") as f:
+        for lines in generate_chat(messages, **options):
+            data = ("\n".join(lines) + "\n").encode("utf-8")
+            f.write(data)
+            size += len(data)
+    return size
+
+
+def add_arguments(parser):
+    """Generator options, shared with the benchmark suite."""
+    parser.add_argument("--users", type=int, default=8, help="chat members (default: 8)")
+    parser.add_argument("--multiline", type=float, default=0.05,
+                        help="share of messages with continuation lines (default: 0.05)")
+    parser.add_argument("--emoji-density", type=float, default=0.05,
+                        help="chance of an emoji after each word (default: 0.05)")
+    parser.add_argument("--system", type=float, default=0.05,
+                        help="share of system lines such as joins and <Media omitted> (default: 0.05)")
+    parser.add_argument("--clock", choices=CLOCKS, default="12h", help="time format (default: 12h)")
+    parser.add_argument("--year-digits", type=int, choices=YEAR_DIGITS, default=2,
+                        help="dd/mm/yy or dd/mm/yyyy dates (default: 2)")
+    parser.add_argument("--days", type=int, default=730, help="days the chat spans (default: 730)")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def generator_options(args):
+    return {
+        "users": args.users,
+        "multiline": args.multiline,
+        "emoji_density": args.emoji_density,
+        "system": args.system,
+        "clock": args.clock,
+        "year_digits": args.year_digits,
+        "days": args.days,
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="output .txt file")
+    parser.add_argument("--messages", type=int, default=10_000, help="header lines to write")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    size = write_chat(args.path, args.messages, **generator_options(args))
+    print(f"{args.path}: {args.messages:,} messages, {size / 1024 ** 2:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+
+def content_key(data):
+    """Stable key for an upload: hash of its raw bytes."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+# ------------------ LRU CACHE ------------------
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and total bytes.
+
+    `sizeof` measures a value once when it is stored. With `disk_dir` set,
+    every value is also pickled there, and a memory miss falls back to the
+    file (which is then promoted back into memory). Files beyond
+    `disk_max_bytes` are pruned oldest-first.
+    """
+
+    def __init__(self, max_entries=8, max_bytes=None, sizeof=None,
+                 disk_dir=None, disk_max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items or (self.disk_dir and os.path.exists(self._path(key)))
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key][0]
+
+        value = self._load(key)
+        if value is None:
+            with self._lock:
+                self.misses += 1
+            return default
+
+        with self._lock:
+            self.hits += 1
+        self._store(key, value)
+        return value
+
+    def put(self, key, value):
+        self._store(key, value)
+        self._dump(key, value)
+        return value
+
+    def get_or_create(self, key, factory):
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, factory())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    # ------------------ INTERNALS ------------------
+    def _store(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._items:
+                self.nbytes -= self._items.pop(key)[1]
+            self._items[key] = (value, size)
+            self.nbytes += size
+            self._evict()
+
+    def _evict(self):
+        # Always keep the newest entry, even if it alone exceeds max_bytes
+        while len(self._items) > 1 and (
+            (self.max_entries is not None and len(self._items) > self.max_entries)
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        ):
+            _, (_, size) = self._items.popitem(last=False)
+            self.nbytes -= size
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _load(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        os.utime(path)
+        return value
+
+    def _dump(self, key, value):
+        if not self.disk_dir:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self._prune_disk()
+
+    def _prune_disk(self):
+        if self.disk_max_bytes is None:
+            return
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries)[:-1]:
+            if total <= self.disk_max_bytes:
+                break
+            os.remove(os.path.join(self.disk_dir, name))
+            total -= size
@@ -0,0 +1,459 @@
+import io
+import mmap
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# ------------------ PATTERNS ------------------
+HEADER_PATTERN = re.compile(
+    r'^(\d{1,2}/\d{1,2}/\d{2,4}),\s*'
+    r'(\d{1,2}:\d{2}[\u202f ]?(?:am|pm|AM|PM)?)\s*-\s*'
+    r'([^:]+):\s*(.*)$'
+)
+
+SYSTEM_PATTERN = re.compile(
+    r'(added|removed|changed|joined|left|deleted|media omitted)',
+    re.IGNORECASE
+)
+
+# Case-insensitive alternation is slow in `re`; the parser lowers the text
+# once and scans it with this case-sensitive twin instead.
+SYSTEM_KEYWORDS = re.compile(SYSTEM_PATTERN.pattern)
+
+TIME_PATTERN = r'(\d{1,2}):(\d{2})[\u202f ]?([AaPp][Mm])?'
+
+# Anchored twins for format detection: day/month/year and the clock's parts
+DATE_PARTS = r'^(\d{1,2})/(\d{1,2})/(\d{2}|\d{4})$'
+TIME_PARTS = r'^\d{1,2}:\d{2}(?:([\u202f ]?)[AaPp][Mm])?$'
+
+# RE2 twins of the patterns above for the Arrow parser. RE2's \s and \d
+# are ASCII-only, so Python's whitespace set is spelled out, and buffers
+# with non-ASCII digits go through `re` instead. Under IGNORECASE `re`
+# also matches "ı" and "İ" for "i".
+_WS = (r'[\t\n\x{0b}\x{0c}\r\x{1c}-\x{1f} \x{85}\x{a0}\x{1680}\x{2000}-\x{200a}'
+       r'\x{2028}\x{2029}\x{202f}\x{205f}\x{3000}]')
+_I = r'[i\x{131}\x{130}]'
+
+ARROW_HEADER_PATTERN = (
+    r'^(?P<Date>[0-9]{1,2}/[0-9]{1,2}/[0-9]{2,4}),' + _WS + r'*'
+    r'(?P<Time>[0-9]{1,2}:[0-9]{2}[\x{202f} ]?(?:am|pm|AM|PM)?)' + _WS + r'*-' + _WS + r'*'
+    r'(?P<User>[^:]+):' + _WS + r'*(?P<Message>.*)$'
+)
+
+ARROW_SYSTEM_PATTERN = rf'(?i)(added|removed|changed|jo{_I}ned|left|deleted|med{_I}a om{_I}tted)'
+
+NON_ASCII_DIGIT = r'[^\P{Nd}0-9]'
+
+COLUMNS = ["Date", "Time", "User", "Message"]
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MONTH_NAMES = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+
+
+# ------------------ INGESTION ------------------
+def _map_file(f):
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # empty files cannot be mapped
+        return b""
+
+
+def open_chat_buffer(file):
+    """Raw bytes of a chat without copying them where possible.
+
+    Paths and real files are memory-mapped. In-memory uploads (Streamlit's
+    `UploadedFile`, `io.BytesIO`) hand out their bytes with `getvalue()`,
+    which CPython does not copy while the buffer is unmodified. The result
+    is `bytes` or `mmap`, so it supports slicing, `find` and `rfind`.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            return _map_file(f)
+    if isinstance(file, (bytes, mmap.mmap)):
+        return file
+    if isinstance(file, (bytearray, memoryview)):
+        return bytes(file)
+    if hasattr(file, "getvalue"):
+        data = file.getvalue()
+    else:
+        try:
+            return _map_file(file)
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            data = file.read()
+    return data.encode("utf-8") if isinstance(data, str) else data
+
+
+def arrow_text(buffer):
+    """The whole buffer as a one-element Arrow string array, without copying.
+
+    Returns None if the bytes are not valid UTF-8.
+    """
+    data = pa.py_buffer(buffer)
+    offsets = pa.py_buffer(np.array([0, data.size], dtype=np.int64))
+    text = pa.Array.from_buffers(pa.large_string(), 1, [None, offsets, data])
+    try:
+        text.validate(full=True)
+    except pa.ArrowInvalid:
+        return None
+    return text
+
+
+# ------------------ HELPERS ------------------
+
+def _is_system(texts):
+    """Vectorised `SYSTEM_PATTERN.search` over a list of single-line strings.
+
+    Case-insensitive alternation is slow in `re`, so the strings are lowered
+    in one call and scanned case-sensitively. "ı" is the only extra case fold
+    these keywords have; if lowering changes the length (e.g. "İ") the lines
+    would no longer line up, so fall back to the IGNORECASE pattern.
+    """
+    joined = "\n".join(texts)
+    lowered = joined.lower().replace("\u0131", "i")
+    if len(lowered) == len(joined):
+        texts, search = lowered.split("\n"), SYSTEM_KEYWORDS.search
+    else:
+        search = SYSTEM_PATTERN.search
+    return np.fromiter(map(bool, map(search, texts)), dtype=bool, count=len(texts))
+
+
+def split_lines(text):
+    return list(map(str.strip, text.split("\n")))
+
+
+def split_messages(text):
+    return messages_from_lines(split_lines(text))
+
+
+def messages_from_lines(lines):
+    """Return [date, time, user, message] rows for every kept message.
+
+    The per-line steps (header match, keyword search) run through `map` so
+    the loop stays in C. A message body runs from its header up to the next
+    "event" line (any header, or a system line), so continuation lines are
+    joined once per message instead of with repeated `+=`.
+    """
+    matches = list(map(HEADER_PATTERN.match, lines))
+    is_header = np.fromiter(map(bool, matches), dtype=bool, count=len(lines))
+    header_lines = np.flatnonzero(is_header)
+    if not len(header_lines):
+        return []
+
+    headers = [matches[i] for i in header_lines.tolist()]
+    other_lines = np.flatnonzero(~is_header)
+
+    # skip empty or system-like messages; system lines also end a message
+    keep = ~_is_system([m[4] for m in headers])
+    is_event = is_header.copy()
+    is_event[other_lines] = _is_system([lines[i] for i in other_lines.tolist()])
+
+    events = np.flatnonzero(is_event)
+    ends = np.append(events, len(lines))[np.searchsorted(events, header_lines, side="right")]
+
+    messages = []
+    for match, line_no, end in zip(
+        (headers[i] for i in np.flatnonzero(keep).tolist()),
+        header_lines[keep].tolist(),
+        ends[keep].tolist()
+    ):
+        date, time, user, message = match.groups()
+        if end > line_no + 1:
+            message = " ".join([message, *lines[line_no + 1:end]])
+        messages.append([date, time, user, message])
+
+    return messages
+
+
+def guess_date_format(messages):
+    """Timestamp format `build_frame(messages)` would detect (see `timestamp_format`).
+
+    Pass it to `build_frame` for later slices of the same export so they
+    parse their timestamps the way a parse of the whole export would.
+    """
+    if not len(messages):
+        return None
+    if isinstance(messages, pa.Table):
+        dates, times = messages["Date"].to_pandas(), messages["Time"].to_pandas()
+    else:
+        dates, times = (pd.Series([row[i] for row in messages]) for i in (0, 1))
+    return timestamp_format(pd.unique(dates), pd.unique(times))
+
+
+def _arrow_is_system(texts):
+    return pc.match_substring_regex(texts, ARROW_SYSTEM_PATTERN).to_numpy(zero_copy_only=False)
+
+
+def messages_table(buffer):
+    """`split_messages` for a raw buffer, run with Arrow compute kernels.
+
+    Lines are split, stripped and matched without creating a Python
+    object per line. Each message body is its header's text plus its
+    continuation lines, joined with " " (the same rules as
+    `messages_from_lines`). Returns None when the buffer needs the `re`
+    path: invalid UTF-8 (which is dropped on decode) or non-ASCII digits.
+    """
+    text = arrow_text(buffer)
+    if text is None or pc.any(pc.match_substring_regex(text, NON_ASCII_DIGIT)).as_py():
+        return None
+
+    lines = pc.utf8_trim_whitespace(pc.split_pattern(text, "\n").flatten())
+    parts = pc.extract_regex(lines, ARROW_HEADER_PATTERN)
+    is_header = parts.is_valid().to_numpy(zero_copy_only=False)
+    header_lines = np.flatnonzero(is_header)
+    headers = parts.filter(is_header)
+    other_lines = np.flatnonzero(~is_header)
+
+    # skip system-like messages; system lines also end a message
+    keep = ~_arrow_is_system(headers.field("Message"))
+    is_event = is_header.copy()
+    is_event[other_lines] = _arrow_is_system(lines.take(other_lines))
+
+    events = np.flatnonzero(is_event)
+    ends = np.append(events, len(lines))[np.searchsorted(events, header_lines, side="right")]
+
+    kept = headers.filter(keep)
+    starts, counts = header_lines[keep], (ends - header_lines)[keep]
+    message = kept.field("Message")
+    if (counts > 1).any():
+        # One list per message: its header text, then its continuation lines
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        position = np.arange(offsets[-1]) - np.repeat(offsets[:-1], counts)
+        take = np.where(
+            position == 0,
+            np.repeat(np.arange(len(starts)), counts),
+            len(starts) + np.repeat(starts, counts) + position,
+        )
+        pieces = pa.concat_arrays([message.cast(pa.large_string()), lines]).take(take)
+        message = pc.binary_join(
+            pa.LargeListArray.from_arrays(offsets, pieces), pa.scalar(" ", pa.large_string())
+        )
+
+    return pa.table([kept.field(column) for column in COLUMNS[:3]] + [message], names=COLUMNS)
+
+
+def split_chat(buffer):
+    """Messages of a raw chat buffer: an Arrow table, or `split_messages` rows."""
+    messages = messages_table(buffer)
+    if messages is None:
+        messages = split_messages(str(buffer, "utf-8", errors="ignore"))
+    return messages
+
+
+def build_frame(messages, date_format=None):
+    """Parsed [date, time, user, message] rows -> the chat DataFrame.
+
+    Date (midnight) and Timestamp (date + time) are datetime64; User,
+    DayName and MonthName are categoricals; Message stays a string column
+    (Arrow-backed on pandas 3 with pyarrow installed). `date_format` is a
+    `timestamp_format` result; by default it is detected from this chat.
+    """
+    if isinstance(messages, pa.Table):
+        # No rows: same empty object columns as the list path
+        df = messages.to_pandas() if len(messages) else pd.DataFrame(columns=COLUMNS)
+    else:
+        df = pd.DataFrame(messages, columns=COLUMNS)
+    df["Date"], df["Time"] = parse_timestamps(df["Date"], df["Time"], date_format)
+    df["Message"] = df["Message"].str.lower().str.strip()
+    df = df.dropna(subset=["Date", "User", "Message"])
+
+    df.insert(1, "Timestamp", df.pop("Time"))
+    df["User"] = df["User"].astype("category")
+    df["DayName"] = pd.Categorical.from_codes(df["Date"].dt.dayofweek, DAY_NAMES)
+    df["MonthName"] = pd.Categorical.from_codes(df["Date"].dt.month - 1, MONTH_NAMES)
+    return sort_chat(df)
+
+
+def sort_chat(df):
+    """Rows in time order, so date ranges are `searchsorted` slices.
+
+    Exports are written in send order, so this is usually only a check.
+    The sort is stable and keeps the row labels (each message's position
+    in the export); messages whose time did not parse go first in their
+    day.
+    """
+    if "Date" not in df or len(df) < 2:
+        return df
+    key = df["Date"].to_numpy()
+    if "Timestamp" in df:
+        stamps = df["Timestamp"].to_numpy()
+        key = np.where(np.isnat(stamps), key, stamps)
+    if (key[1:] >= key[:-1]).all():
+        return df
+    return df.iloc[np.argsort(key, kind="stable")]
+
+
+# ------------------ TIMESTAMPS ------------------
+def timestamp_format(dates, times):
+    """strptime format of an export's "date time" headers, from its distinct values.
+
+    The year has the digits most dates have; the order is mm/dd when more
+    dates have a second field above 12 than a first one, else dd/mm (also
+    the guess when no date says). Dates that do not fit are dropped by
+    `build_frame`, as they were when the first date set the format. The
+    clock is 24h, or 12h with am/pm after a space, a narrow no-break space
+    or nothing; exports mixing clocks get no time part, which leaves them
+    to `time_of_day`.
+    """
+    parts = pd.Series(dates, dtype=object).str.extract(DATE_PARTS).dropna()
+    date_format = "mixed"
+    if len(parts):
+        digits = parts[2].str.len()
+        parts = parts[digits == digits.mode()[0]]
+        first, second = parts[0].astype(int), parts[1].astype(int)
+        order = "%m/%d" if (second > 12).sum() > (first > 12).sum() else "%d/%m"
+        date_format = f"{order}/{'%y' if digits.mode()[0] == 2 else '%Y'}"
+
+    # 24h headers keep the space before " - "
+    clock = pd.Series(times, dtype=object).str.strip().str.extract(TIME_PARTS)[0]
+    time_format = ""
+    if len(clock) and clock.isna().all():
+        time_format = "%H:%M"
+    elif len(clock) and clock.notna().all() and clock.nunique() == 1:
+        time_format = f"%I:%M{clock.iloc[0]}%p"
+    return f"{date_format} {time_format}" if time_format else date_format
+
+
+def parse_timestamps(dates, times, date_format=None):
+    """(date, timestamp) datetime64[s] arrays for header date and time strings.
+
+    Each distinct date and time is parsed once with the explicit format
+    (`timestamp_format`, detected here when not given) and the results
+    are spread back with the factorize codes. Unparseable dates give NaT
+    in both arrays, unparseable times only in the timestamps.
+    """
+    date_codes, dates = pd.factorize(dates)
+    time_codes, times = pd.factorize(times)
+    if date_format is None:
+        date_format = timestamp_format(dates, times)
+    # States saved before the time part was detected hold only the date's
+    date_format, _, time_format = date_format.partition(" ")
+    dates = _parse_unique(dates, date_codes, date_format)
+    return dates, dates + _time_offsets(times, time_codes, time_format or None)
+
+
+def _parse_unique(values, codes, format):
+    """datetime64[s] array for `values[codes]`, parsing each distinct value once."""
+    parsed = pd.to_datetime(pd.Series(values, dtype=object), format=format, dayfirst=True, errors="coerce")
+    parsed = parsed.dt.normalize().to_numpy().astype("datetime64[s]")
+    return np.append(parsed, np.datetime64("NaT", "s"))[codes]
+
+
+def _time_offsets(times, codes, format):
+    """Timedelta since midnight for `times[codes]`; by `time_of_day` without a format."""
+    if format is None:
+        return time_of_day(pd.Series(times, dtype=object)).to_numpy()[codes]
+    parsed = pd.to_datetime(pd.Series(times, dtype=object).str.strip(), format=format, errors="coerce")
+    offsets = (parsed - parsed.dt.normalize()).astype("timedelta64[s]")
+    return np.append(offsets.to_numpy(), np.timedelta64("NaT", "s"))[codes]
+
+
+def time_of_day(times):
+    """Parse "9:54 pm" / "21:54" strings into a timedelta since midnight.
+
+    Each distinct time is parsed once; impossible clock times give NaT.
+    """
+    codes, uniques = pd.factorize(times)
+    parts = pd.Series(uniques, dtype=object).str.extract(TIME_PATTERN)
+    hours = parts[0].astype(float)
+    minutes = parts[1].astype(float)
+    meridiem = parts[2].str.lower()
+    hours = hours.where(meridiem.isna(), hours % 12 + (meridiem == "pm") * 12)
+    offsets = (hours * 60 + minutes).where((hours < 24) & (minutes < 60))
+    minutes = np.append(offsets.to_numpy(), np.nan)[codes]
+    return pd.to_timedelta(pd.Series(minutes, index=times.index), unit="min")
+
+
+def concat_frames(frames):
+    """`pd.concat` for chat frames that keeps categorical columns categorical.
+
+    Frames parsed separately have different User categories, which plain
+    `pd.concat` would turn back into strings, so the categories are merged
+    first. Empty frames are skipped.
+    """
+    frames = list(frames)
+    parts = [df for df in frames if len(df)] or frames[:1]
+    if len(parts) == 1:
+        return parts[0]
+    for column in parts[0].columns:
+        dtypes = [df[column].dtype for df in parts]
+        if isinstance(dtypes[0], pd.CategoricalDtype) and any(dtype != dtypes[0] for dtype in dtypes):
+            categories = dtypes[0].categories
+            for dtype in dtypes[1:]:
+                categories = categories.union(dtype.categories)
+            parts = [df.assign(**{column: df[column].cat.set_categories(categories)}) for df in parts]
+    return pd.concat(parts)
+
+
+# ------------------ CHAT PARSER ------------------
+def parse_chat(file):
+    """Parse a chat export from a path, an upload or a binary file object."""
+    return build_frame(split_chat(open_chat_buffer(file)))
+
+
+# ------------------ STREAMING PARSER ------------------
+def _last_header(lines):
+    for i in range(len(lines) - 1, -1, -1):
+        if HEADER_PATTERN.match(lines[i]):
+            return i
+    return None
+
+
+def iter_chat_batches(file, batch_size=50_000, chunk_bytes=8 << 20):
+    """Parse a binary chat file in bounded chunks, yielding DataFrame batches.
+
+    Every batch holds `batch_size` messages (the last one may be shorter) and
+    keeps the row labels `parse_chat` would have given them, so for an
+    export in time order with one consistent date format
+    `concat_frames(iter_chat_batches(f))` matches `parse_chat(f)`. Lines from
+    the last header of a chunk onwards are held back, since the message
+    they start may continue in the next chunk. The timestamp format is
+    detected on the first batch and used for all of them, so a later batch
+    whose days are all <= 12 is not read in the other date order.
+    """
+    pending = []
+    tail = b""
+    buffer = []
+    offset = 0
+    date_format = None
+
+    while True:
+        chunk = file.read(chunk_bytes)
+        if chunk:
+            data = tail + chunk
+            cut = data.rfind(b"\n")
+            if cut < 0:
+                tail = data
+                continue
+            tail = data[cut + 1:]
+
+            lines = pending + split_lines(data[:cut].decode("utf-8", errors="ignore"))
+            last = _last_header(lines)
+            if last is None:
+                pending = []
+            else:
+                lines, pending = lines[:last], lines[last:]
+        else:
+            lines = pending + split_lines(tail.decode("utf-8", errors="ignore"))
+            pending = []
+
+        buffer.extend(messages_from_lines(lines))
+
+        while len(buffer) >= batch_size or (not chunk and buffer):
+            batch, buffer = buffer[:batch_size], buffer[batch_size:]
+            if date_format is None:
+                date_format = guess_date_format(batch)
+            df = build_frame(batch, date_format)
+            df.index += offset
+            offset += len(batch)
+            yield df
+
+        if not chunk:
+            return
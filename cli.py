@@ -0,0 +1,215 @@
+"""Headless batch analysis of WhatsApp chat exports.
+
+Analyses many exports in parallel without Streamlit and writes one
+summary per chat. Run from the repository root:
+
+    python cli.py exports/ more/chat.txt --out results --format json parquet
+
+With --state-dir, nightly runs over newer exports of the same chats only
+analyse the messages added since the last run. With --stream, text
+exports are read in batches and only the counters are kept, so exports
+larger than memory can be summarized.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from aggregates import ChatStats, build_user_index
+from chat_cache import LRUCache
+from chat_parser import iter_chat_batches, open_chat_buffer
+from conversations import SESSION_GAP, Conversations
+from incremental import ChatState, analyze_export
+from pipeline import init_worker, prepare
+from sentiment import BACKENDS
+from storage import columnar_format, load_chat_file, save_chat
+
+CHAT_SUFFIXES = (".txt", ".parquet", ".pq", ".feather", ".arrow")
+
+
+# ------------------ INPUTS ------------------
+def find_chats(paths):
+    """Expand files and directories (searched recursively) into chat paths."""
+    chats = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                chats.extend(
+                    os.path.join(root, name) for name in sorted(names)
+                    if name.lower().endswith(CHAT_SUFFIXES)
+                )
+        else:
+            chats.append(path)
+    return chats
+
+
+@lru_cache(maxsize=None)
+def _states(state_dir):
+    # One state in memory per worker; the rest are read back from disk
+    return LRUCache(max_entries=1, disk_dir=state_dir)
+
+
+def load_chat(path, state_dir=None, backend=None):
+    """(enriched chat, user index) for one file."""
+    if columnar_format(path):
+        df = prepare(load_chat_file(path), backend=backend)
+        return df, build_user_index(df)
+
+    data = open_chat_buffer(path)
+    if state_dir:
+        state = analyze_export(data, _states(state_dir), backend=backend)
+    else:
+        state = ChatState.from_export(data, backend=backend)
+    return state.df, state.index
+
+
+def stream_stats(path, backend=None, batch_size=50_000):
+    """ChatStats of a .txt export, enriched and counted one batch at a time."""
+    with open(path, "rb") as f:
+        batches = (prepare(batch, backend=backend) for batch in iter_chat_batches(f, batch_size))
+        return ChatStats.from_batches(batches)
+
+
+# ------------------ SUMMARY ------------------
+def _counts_dict(series):
+    return {str(key): int(count) for key, count in series.items()}
+
+
+def summarize(summary):
+    """JSON-ready version of a user index entry (e.g. the "Overall" panels)."""
+    timeline = summary["timeline"]
+    return {
+        "messages": summary["messages"],
+        "active_days": summary["active_days"],
+        "first_date": timeline.index.min().date().isoformat() if len(timeline) else None,
+        "last_date": timeline.index.max().date().isoformat() if len(timeline) else None,
+        "users": _counts_dict(summary["users"]),
+        "sentiment": _counts_dict(summary["sentiment"]),
+        "timeline": {key.date().isoformat(): int(count) for key, count in timeline.items()},
+        "days": _counts_dict(summary["days"]),
+        "months": _counts_dict(summary["months"]),
+        # weekday -> messages per hour 0..23
+        "heatmap": {day: [int(count) for count in row] for day, row in summary["heatmap"].iterrows()},
+        "words": summary["words"],
+        "emojis": summary["emojis"],
+    }
+
+
+def summarize_conversations(conversations):
+    """JSON-ready sessions, conversation starters and reply times (minutes)."""
+    talk = conversations.summary()
+    matrix = talk["reply_matrix"]
+    return {
+        "session_gap_minutes": conversations.gap,
+        "sessions": talk["sessions"],
+        "messages_per_session": round(talk["messages_per_session"], 2),
+        "median_session_minutes": talk["session_minutes"],
+        "replies": talk["replies"],
+        "median_reply_minutes": talk["median_reply_minutes"],
+        "starters": _counts_dict(talk["starters"]),
+        "reply_times": _counts_dict(talk["response_buckets"]),
+        "response_times": {
+            str(user): {"replies": int(row["Replies"]), "median": round(row["Median"], 2),
+                        "mean": round(row["Mean"], 2), "p90": round(row["90th pct"], 2)}
+            for user, row in talk["response_times"].iterrows()
+        },
+        # replier -> {replied-to member: replies}
+        "reply_to": {
+            str(user): {str(to): int(count) for to, count in row.items() if count}
+            for user, row in matrix.iterrows() if row.any()
+        },
+    }
+
+
+def _write_json(stem, summary):
+    with open(f"{stem}.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+def analyze_file(path, out_dir, formats=("json",), state_dir=None, backend=None, session_gap=SESSION_GAP,
+                 stream=False):
+    """Parse, enrich and summarize one chat; returns (path, messages, seconds)."""
+    start = time.perf_counter()
+    stem = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0])
+
+    if stream and not columnar_format(path):
+        # Conversations need every timestamp at once, so streamed summaries leave them out
+        stats = stream_stats(path, backend)
+        _write_json(stem, {"source": path, **summarize(stats.summary())})
+        return path, stats.messages, time.perf_counter() - start
+
+    df, index = load_chat(path, state_dir, backend)
+    if "json" in formats:
+        _write_json(stem, {"source": path, **summarize(index["Overall"]),
+                           "conversations": summarize_conversations(Conversations.from_frame(df, session_gap))})
+    if "parquet" in formats:
+        save_chat(df, f"{stem}.parquet")
+    return path, len(df), time.perf_counter() - start
+
+
+# ------------------ BATCH RUN ------------------
+def run(paths, out_dir, formats=("json",), workers=None, state_dir=None, backend=None, session_gap=SESSION_GAP,
+        stream=False):
+    """Analyse every chat in `paths`, yielding (path, messages, seconds) in input order.
+
+    Chats with the same file name in different folders would overwrite
+    each other's outputs, so keep names unique within one run.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(paths) == 1:
+        init_worker(backend)
+        for path in paths:
+            yield analyze_file(path, out_dir, formats, state_dir, backend, session_gap, stream)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths)), initializer=init_worker,
+                             initargs=(backend,)) as pool:
+        futures = [pool.submit(analyze_file, path, out_dir, formats, state_dir, backend, session_gap, stream)
+                   for path in paths]
+        for future in futures:
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="chat exports (.txt, .parquet, .feather) or folders")
+    parser.add_argument("--out", default="analysis", help="output folder (default: analysis)")
+    parser.add_argument("--format", nargs="+", choices=["json", "parquet"], default=["json"],
+                        help="outputs to write per chat (default: json)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parallel processes (default: one per CPU)")
+    parser.add_argument("--state-dir", default=None,
+                        help="keep analysed exports here and only analyse new messages next time")
+    parser.add_argument("--sentiment", choices=sorted(BACKENDS), default=None,
+                        help="sentiment backend (default: $SENTIMENT_BACKEND or textblob)")
+    parser.add_argument("--session-gap", type=int, default=SESSION_GAP, metavar="MINUTES",
+                        help=f"silence that starts a new conversation (default: {SESSION_GAP})")
+    parser.add_argument("--stream", action="store_true",
+                        help="read .txt exports in batches, keeping only the counters (JSON without conversations)")
+    args = parser.parse_args(argv)
+    if args.stream and (args.state_dir or "parquet" in args.format):
+        parser.error("--stream writes JSON summaries only: drop --state-dir and the parquet format")
+
+    paths = find_chats(args.paths)
+    if not paths:
+        parser.error("no chat files found")
+
+    start = time.perf_counter()
+    files = messages = 0
+    for path, count, seconds in run(paths, args.out, tuple(args.format), args.workers, args.state_dir,
+                                    args.sentiment, args.session_gap, args.stream):
+        files += 1
+        messages += count
+        print(f"{path}: {count} messages in {seconds:.2f}s")
+
+    elapsed = time.perf_counter() - start
+    print(f"{files} files, {messages} messages in {elapsed:.2f}s "
+          f"({files / elapsed:.2f} files/sec, {messages / elapsed:,.0f} messages/sec)")
+
+
+if __name__ == "__main__":
+    main()
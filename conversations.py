@@ -0,0 +1,192 @@
+import numpy as np
+import pandas as pd
+
+# Silence longer than this ends a conversation (minutes)
+SESSION_GAP = 60
+
+# Upper edges (minutes) of the response time histogram; the last bucket is open
+RESPONSE_BUCKETS = [1, 5, 15, 30]
+
+
+def _bucket_labels(edges):
+    labels = ["< 1 min" if edges[0] == 1 else f"< {edges[0]} min"]
+    labels += [f"{low}–{high} min" for low, high in zip(edges[:-1], edges[1:])]
+    return labels + [f"{edges[-1]}+ min"]
+
+
+def _grouped_quantile(values, groups, size, q):
+    """`q`-quantile of `values` per group code (linear, like `np.quantile`); NaN for empty groups."""
+    order = np.lexsort((values, groups))
+    values = values[order]
+    counts = np.bincount(groups, minlength=size)
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    result = np.full(size, np.nan)
+    has = counts > 0
+    position = offsets[has] + q * (counts[has] - 1)
+    low = np.floor(position).astype(np.int64)
+    high = np.ceil(position).astype(np.int64)
+    result[has] = values[low] + (values[high] - values[low]) * (position - low)
+    return result
+
+
+# ------------------ CONVERSATIONS ------------------
+class Conversations:
+    """Conversation sessions and reply latencies from one pass over the timestamps.
+
+    Messages are taken in time order (rows without a time are left out)
+    and a session ends wherever the silence before the next message is
+    longer than `gap` minutes. Within a session, a message from a
+    different member than the one before it is a reply to that member;
+    its latency is the time since that previous message. Everything is
+    derived with `np.diff` / shifted comparisons and `np.bincount`, so
+    the cost stays linear in the number of messages, and only per-session
+    and per-reply arrays are kept.
+    """
+
+    def __init__(self, users, gap, sessions, members, replies):
+        self.users = users
+        self.gap = gap
+        # start, end (datetime64[s]), messages, members, starter code
+        self.sessions = sessions
+        # unique (session, member code, messages) triples
+        self.members = members
+        # replier code, replied-to code, latency in seconds
+        self.replies = replies
+
+    @classmethod
+    def from_frame(cls, df, gap=SESSION_GAP):
+        if isinstance(df["User"].dtype, pd.CategoricalDtype):
+            codes, users = df["User"].cat.codes.to_numpy(np.int64), list(df["User"].cat.categories.astype(str))
+        else:
+            codes, users = pd.factorize(df["User"], sort=True)
+            users = list(users)
+        if "Timestamp" in df:
+            stamps = df["Timestamp"].to_numpy().astype("datetime64[s]")
+        else:
+            stamps = np.full(len(df), np.datetime64("NaT", "s"))
+        rows = np.flatnonzero(~np.isnat(stamps) & (codes >= 0))
+        seconds = stamps[rows].astype(np.int64)
+        if len(seconds) and (np.diff(seconds) < 0).any():
+            order = np.argsort(seconds, kind="stable")
+            rows, seconds = rows[order], seconds[order]
+        codes = codes[rows]
+
+        # Time since the previous message; a gap starts a new session
+        waits = np.diff(seconds)
+        new_session = np.ones(len(seconds), dtype=bool)
+        new_session[1:] = waits > gap * 60
+        starts = np.flatnonzero(new_session)
+        ends = np.append(starts[1:], len(seconds))[:len(starts)] - 1
+        session = np.cumsum(new_session) - 1
+
+        # Who took part, counted on unique (session, member) pairs
+        pair = session * max(len(users), 1) + codes
+        pairs, messages = np.unique(pair, return_counts=True)
+        pair_session, pair_user = np.divmod(pairs, max(len(users), 1))
+        sessions = {
+            "start": seconds[starts].astype("datetime64[s]"),
+            "end": seconds[ends].astype("datetime64[s]"),
+            "messages": ends - starts + 1,
+            "members": np.bincount(pair_session, minlength=len(starts)),
+            "starter": codes[starts],
+        }
+        members = {"session": pair_session, "user": pair_user, "messages": messages}
+
+        # A change of sender inside a session is a reply to the previous sender
+        switch = np.flatnonzero((codes[1:] != codes[:-1]) & ~new_session[1:])
+        replies = {"user": codes[switch + 1], "to": codes[switch], "seconds": waits[switch]}
+        return cls(users, gap, sessions, members, replies)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for part in (self.sessions, self.members, self.replies) for array in part.values())
+
+    def _codes(self, users):
+        """Codes of a member (or list of members), or None for everyone."""
+        users = [users] if isinstance(users, str) else users or ()
+        codes = [self.users.index(user) for user in users if user != "Overall"]
+        return np.array(codes, dtype=np.int64) if codes else None
+
+    def _named(self, counts, name):
+        counts = pd.Series(counts, index=pd.Index(self.users, name="User"), dtype="int64", name=name)
+        return counts[counts > 0].sort_values(ascending=False, kind="stable")
+
+    # ------------------ VIEWS ------------------
+    def session_table(self, users=None):
+        """One row per conversation (those `users` wrote in, if given), oldest first."""
+        keep = slice(None)
+        codes = self._codes(users)
+        if codes is not None:
+            keep = np.unique(self.members["session"][np.isin(self.members["user"], codes)])
+        sessions = {name: values[keep] for name, values in self.sessions.items()}
+        return pd.DataFrame({
+            "Start": sessions["start"],
+            "End": sessions["end"],
+            "Minutes": (sessions["end"] - sessions["start"]).astype(np.int64) / 60,
+            "Messages": sessions["messages"],
+            "Members": sessions["members"],
+            "Started by": pd.Categorical.from_codes(sessions["starter"], self.users),
+        })
+
+    def starters(self):
+        """Conversations started per member, most first."""
+        return self._named(np.bincount(self.sessions["starter"], minlength=len(self.users)), "Conversations")
+
+    def reply_matrix(self):
+        """Replies sent by each member (rows) to each member (columns)."""
+        size = len(self.users)
+        counts = np.bincount(self.replies["user"] * size + self.replies["to"], minlength=size * size)
+        return pd.DataFrame(counts.reshape(size, size), dtype="int64",
+                            index=pd.Index(self.users, name="User"), columns=pd.Index(self.users, name="To"))
+
+    def response_times(self):
+        """Replies and reply latency (minutes) per member, quickest median first."""
+        size = len(self.users)
+        minutes = self.replies["seconds"] / 60
+        counts = np.bincount(self.replies["user"], minlength=size)
+        table = pd.DataFrame({
+            "Replies": counts,
+            "Median": _grouped_quantile(minutes, self.replies["user"], size, 0.5),
+            "Mean": np.bincount(self.replies["user"], weights=minutes, minlength=size) / np.maximum(counts, 1),
+            "90th pct": _grouped_quantile(minutes, self.replies["user"], size, 0.9),
+        }, index=pd.Index(self.users, name="User"))
+        return table[counts > 0].sort_values("Median", kind="stable")
+
+    def response_buckets(self, users=None):
+        """Replies of `users` (everyone by default) per latency bucket."""
+        minutes = self.replies["seconds"] / 60
+        codes = self._codes(users)
+        if codes is not None:
+            minutes = minutes[np.isin(self.replies["user"], codes)]
+        buckets = np.searchsorted(RESPONSE_BUCKETS, minutes, side="right")
+        counts = np.bincount(buckets, minlength=len(RESPONSE_BUCKETS) + 1)
+        return pd.Series(counts, index=pd.Index(_bucket_labels(RESPONSE_BUCKETS), name="Reply time"),
+                         dtype="int64", name="count")
+
+    def summary(self, users=None):
+        """Everything the conversation panels show for `users` (a member or a list; "Overall" = everyone)."""
+        codes = self._codes(users)
+        sessions = self.session_table(users)
+        replies = self.replies["seconds"]
+        if codes is not None:
+            replies = replies[np.isin(self.replies["user"], codes)]
+        matrix = self.reply_matrix()
+        replies_to = replied_by = None
+        if codes is not None:
+            replies_to = self._named(matrix.iloc[codes].sum(axis=0).to_numpy(), "Replies")
+            replied_by = self._named(matrix.iloc[:, codes].sum(axis=1).to_numpy(), "Replies")
+        return {
+            "sessions": len(sessions),
+            "started": len(sessions) if codes is None else int(np.isin(self.sessions["starter"], codes).sum()),
+            "messages_per_session": float(sessions["Messages"].mean()) if len(sessions) else 0.0,
+            "session_minutes": float(sessions["Minutes"].median()) if len(sessions) else 0.0,
+            "replies": len(replies),
+            "median_reply_minutes": float(np.median(replies)) / 60 if len(replies) else None,
+            "starters": self.starters(),
+            "response_times": self.response_times(),
+            "response_buckets": self.response_buckets(users),
+            "reply_matrix": matrix,
+            "replies_to": replies_to,
+            "replied_by": replied_by,
+            "session_table": sessions,
+        }
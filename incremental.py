@@ -0,0 +1,181 @@
+import numpy as np
+
+from aggregates import INDEX_VERSION, ChatStats, index_from_stats, user_stats
+from chat_cache import content_key
+from chat_parser import HEADER_PATTERN, build_frame, concat_frames, guess_date_format, sort_chat, split_chat
+from pipeline import prepare
+from profiling import stage
+from sentiment import get_backend
+
+FINGERPRINT_LINES = 50
+
+
+def _decode(data):
+    return str(data, "utf-8", errors="ignore")
+
+
+def chat_fingerprint(data, lines=FINGERPRINT_LINES):
+    """Hash of an export's first `lines` lines, or None for shorter exports.
+
+    WhatsApp exports are cumulative, so every later export of the same
+    chat starts with the same bytes.
+    """
+    end = -1
+    for _ in range(lines):
+        end = data.find(b"\n", end + 1)
+        if end < 0:
+            return None
+    return content_key(data[:end + 1])
+
+
+def _last_header_offset(data):
+    """Byte offset of the last message header line, scanning back from the end."""
+    end = len(data)
+    while end > 0:
+        start = data.rfind(b"\n", 0, end) + 1
+        if HEADER_PATTERN.match(_decode(data[start:end]).strip()):
+            return start
+        end = start - 1
+    return None
+
+
+# ------------------ CHAT STATE ------------------
+class ChatState:
+    """An analysed export that a newer export of the same chat can extend.
+
+    Everything before the export's last header line (the "head") is final:
+    a later export repeats those bytes unchanged. The last message may
+    still grow continuation lines, so `extend` re-parses from that line
+    onwards and only the new messages are parsed, scored and counted.
+    Row labels stay the message positions `parse_chat` would give, rows
+    stay in time order and timestamps are parsed with the format detected
+    on the first export, so the result matches a full re-analysis of the
+    newer export.
+    """
+
+    def __init__(self, df, members, overall, date_format, size, tail_offset, tail_line,
+                 head_messages, options):
+        self.df = df
+        self.members = members
+        self.overall = overall
+        self.index = index_from_stats(members, overall)
+        self.date_format = date_format
+        self.size = size
+        self.tail_offset = tail_offset
+        self.tail_line = tail_line
+        self.head_messages = head_messages
+        self.options = options
+        self.version = INDEX_VERSION
+
+    @classmethod
+    def from_export(cls, data, **options):
+        """Analyse a whole export; `options` are passed on to `pipeline.prepare`."""
+        with stage("parse") as record:
+            messages = split_chat(data)
+            df = build_frame(messages)
+            record["rows"] = len(df)
+        with stage("enrich", rows=len(df)):
+            df = prepare(df, **options)
+        with stage("index", rows=len(df)):
+            members = user_stats(df)
+            overall = ChatStats().update(df)
+        return cls(df, members, overall, guess_date_format(messages), len(data),
+                   *cls._split_tail(data, len(messages)), options)
+
+    @staticmethod
+    def _split_tail(data, messages):
+        """(tail offset, tail header line, messages before it) for an export
+        that parses into `messages` messages in total."""
+        offset = _last_header_offset(data)
+        if offset is None:
+            return None, b"", messages
+        line_end = data.find(b"\n", offset)
+        tail_line = bytes(data[offset:line_end + 1 if line_end >= 0 else len(data)])
+        tail_messages = len(split_chat(data[offset:]))
+        return offset, tail_line, messages - tail_messages
+
+    def can_extend(self, data):
+        """True when `data` looks like this export plus newer messages."""
+        if self.tail_offset is None or len(data) <= self.size:
+            return False
+        end = self.tail_offset + len(self.tail_line)
+        return data[self.tail_offset:end] == self.tail_line
+
+    def extend(self, data):
+        """State for a newer export, parsing only the bytes after the head.
+
+        Returns None when the new messages show the stored format was a
+        wrong guess (e.g. mm/dd dates past the 12th after a chat that only
+        had ambiguous ones); the export then needs a full analysis.
+        """
+        with stage("parse new messages") as record:
+            messages = split_chat(data[self.tail_offset:])
+            # Until the chat has a message there is no format to reuse
+            date_format = self.date_format or guess_date_format(messages)
+            tail = build_frame(messages, date_format)
+            if len(tail) < len(messages) and len(build_frame(messages)) > len(tail):
+                return None
+            tail.index += self.head_messages
+            record["rows"] = len(tail)
+        with stage("enrich", rows=len(tail)):
+            tail = prepare(tail, **self.options)
+
+        # Old rows from the re-parsed tail are dropped and their counts removed
+        kept = self.df.index < self.head_messages
+        keep = int(kept.sum())
+        # Usually the last rows, unless the chat was re-sorted around them
+        in_place = bool(kept[:keep].all())
+        dropped = self.df.iloc[keep:] if in_place else self.df[~kept]
+        appended = concat_frames([self.df.iloc[:keep] if in_place else self.df[kept], tail])
+        df = sort_chat(appended)
+
+        with stage("index", rows=len(tail)):
+            members = self._merge_members(keep, dropped, tail)
+            # Removed and appended in export order, so ties still rank by first appearance
+            overall = self.overall.copy()
+            overall -= ChatStats().update(dropped)
+            overall += ChatStats().update(tail)
+            if df is not appended or not in_place:
+                # Messages older than the ones before them moved rows around
+                positions = df.groupby("User", sort=True, observed=True).indices
+                members = {user: (positions[user], stats) for user, (_, stats) in members.items()}
+
+        total = self.head_messages + len(messages)
+        return ChatState(df, members, overall, date_format, len(data),
+                         *self._split_tail(data, total), self.options)
+
+    def _merge_members(self, keep, dropped, tail):
+        members = dict(self.members)
+        # Counters are copied before changing so this state stays valid
+        for user, (_, removed) in user_stats(dropped).items():
+            rows, stats = members[user]
+            stats = stats.copy()
+            stats -= removed
+            members[user] = (rows[rows < keep], stats)
+        for user, (new_rows, added) in user_stats(tail).items():
+            rows, stats = members.get(user, (np.array([], dtype=np.intp), ChatStats()))
+            stats = stats.copy()
+            stats += added
+            members[user] = (np.concatenate([rows, new_rows + keep]), stats)
+        return {user: member for user, member in members.items() if member[1].messages}
+
+
+def analyze_export(data, states, **options):
+    """Analyse a .txt export, extending a stored state when one matches.
+
+    `states` is any cache with `get` / `put` (e.g. `chat_cache.LRUCache`),
+    keyed by `chat_fingerprint`. A state scored with another sentiment
+    backend or saved by an older version is not extended. Returns the new `ChatState`.
+    """
+    fingerprint = chat_fingerprint(data)
+    state = states.get(fingerprint) if fingerprint else None
+    if (state is not None and getattr(state, "version", None) == INDEX_VERSION and state.can_extend(data)
+            and get_backend(state.options.get("backend")).name == get_backend(options.get("backend")).name):
+        state = state.extend(data)
+    else:
+        state = None
+    if state is None:
+        state = ChatState.from_export(data, **options)
+    if fingerprint:
+        states.put(fingerprint, state)
+    return state
@@ -0,0 +1,68 @@
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
+
+import pandas as pd
+
+from profiling import stage
+from sentiment import SENTIMENT_LABELS, SentimentEngine, get_backend
+from text_features import extract_emojis, extract_words
+
+
+# ------------------ WORKERS ------------------
+def init_worker(backend=None):
+    # Load the sentiment lexicon once per process instead of once per chunk
+    get_backend(backend).polarities(["warm up"])
+
+
+def enrich_chunk(messages, backend=None):
+    """Sentiment label, emoji list and word list for each message."""
+    with stage("sentiment", rows=len(messages)):
+        sentiment = SentimentEngine(backend=backend).score(pd.Series(messages, dtype=object)).tolist()
+    with stage("emojis", rows=len(messages)):
+        emojis = [tuple(extract_emojis(msg)) for msg in messages]
+    with stage("words", rows=len(messages)):
+        words = [extract_words(msg) for msg in messages]
+    return sentiment, emojis, words
+
+
+# ------------------ ENRICHMENT ------------------
+def enrich(df, workers=0, chunk_size=20_000, backend=None):
+    """Add Sentiment, Emojis and Words columns to a parsed chat.
+
+    `backend` names the sentiment backend (see `sentiment.BACKENDS`);
+    None uses SENTIMENT_BACKEND or TextBlob.
+
+    With `workers` > 1 the Message column is split into `chunk_size`
+    shards that are scored in a spawned process pool (spawn, because the
+    Streamlit server is multi-threaded) and reassembled in order.
+    Otherwise everything runs in-process as a single shard, which lets
+    the sentiment engine dedupe across the whole chat.
+    """
+    messages = df["Message"].tolist()
+
+    if workers and workers > 1 and len(messages) > chunk_size:
+        chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(backend,),
+        ) as pool:
+            results = list(pool.map(partial(enrich_chunk, backend=backend), chunks))
+    else:
+        results = [enrich_chunk(messages, backend)]
+
+    sentiment, emojis, words = (list(chain.from_iterable(part)) for part in zip(*results))
+    df["Sentiment"] = pd.Categorical(sentiment, categories=SENTIMENT_LABELS)
+    df["Emojis"] = pd.Series(emojis, index=df.index, dtype=object)
+    df["Words"] = pd.Series(words, index=df.index, dtype=object)
+    return df
+
+
+def prepare(df, workers=0, chunk_size=20_000, backend=None):
+    """`enrich` a chat unless it already is (e.g. a chat saved enriched)."""
+    if not {"Sentiment", "Emojis", "Words"} <= set(df.columns):
+        df = enrich(df, workers=workers, chunk_size=chunk_size, backend=backend)
+    return df
@@ -0,0 +1,145 @@
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_active = ContextVar("profiler", default=None)
+_dump_lock = threading.Lock()
+
+PSTATS_SUFFIXES = (".prof", ".pstats")
+
+
+def rss_bytes():
+    """Resident memory of this process, or None where it cannot be read.
+
+    Linux reports the current RSS; elsewhere only the peak is available,
+    so memory deltas there only show growth of the peak.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    """Peak resident memory of this process, or None where it cannot be read."""
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# ------------------ PROFILER ------------------
+class Profiler:
+    """Wall time, CPU time, rows and memory change of named pipeline stages.
+
+    CPU time is the calling thread's, so other Streamlit sessions and the
+    warm-up thread do not show up in a stage's `cpu_s`.
+
+    Record a stage with `with profiler.stage("parse") as record:`. Code
+    that does not hold the profiler (the parser, the enrichment pipeline)
+    uses the module-level `stage(...)` instead, which records into the
+    profiler `activate()`d around it and does nothing otherwise. Stages
+    can nest; `depth` keeps the nesting. `context` (file name, member, ...)
+    is copied into every dumped record.
+
+    `start()` / `finish()` bracket one run (a Streamlit rerun): with
+    `pstats_path` the run is profiled with cProfile and written there,
+    and with `jsonl_path` the stages are appended as JSON lines.
+    """
+
+    def __init__(self, jsonl_path=None, pstats_path=None, **context):
+        self.records = []
+        self.context = context
+        self.jsonl_path = jsonl_path
+        self.pstats_path = pstats_path
+        self._depth = 0
+        self._profile = None
+
+    def start(self):
+        if self.pstats_path:
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError:
+                # another profiler (e.g. a concurrent session) is running
+                self._profile = None
+        return self
+
+    def finish(self):
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.pstats_path)
+            self._profile = None
+        if self.jsonl_path:
+            self.dump_jsonl(self.jsonl_path)
+
+    @contextmanager
+    def activate(self):
+        """Send module-level `stage(...)` records to this profiler."""
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Record one stage; set `record["rows"]` inside when the count is known late."""
+        # Appended now so records stay in start order (parents before children)
+        record = {"stage": name, "depth": self._depth, "rows": rows}
+        self.records.append(record)
+        memory = rss_bytes()
+        wall, cpu = time.perf_counter(), time.thread_time()
+        self._depth += 1
+        try:
+            yield record
+        finally:
+            self._depth -= 1
+            record["wall_s"] = time.perf_counter() - wall
+            record["cpu_s"] = time.thread_time() - cpu
+            after = rss_bytes()
+            record["mem_mb"] = None if memory is None or after is None else (after - memory) / 1024 ** 2
+
+    def dump_jsonl(self, path):
+        """Append one JSON line per stage to `path`."""
+        run = {"time": datetime.now(timezone.utc).isoformat(timespec="seconds"), **self.context}
+        lines = [json.dumps({**run, **record}, ensure_ascii=False, default=str) for record in self.records]
+        with _dump_lock, open(path, "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+
+
+@contextmanager
+def stage(name, rows=None):
+    """`Profiler.stage` on the active profiler; a no-op record otherwise."""
+    profiler = _active.get()
+    if profiler is None:
+        yield {"stage": name, "rows": rows}
+        return
+    with profiler.stage(name, rows) as record:
+        yield record
+
+
+def profiler_from_env(**context):
+    """A Profiler that dumps where ANALYZER_PROFILE points, if it is set.
+
+    A .prof / .pstats path gets a cProfile dump of the latest run; any
+    other path gets every run's stages appended as JSON lines.
+    """
+    path = os.environ.get("ANALYZER_PROFILE") or None
+    if path and path.lower().endswith(PSTATS_SUFFIXES):
+        return Profiler(pstats_path=path, **context)
+    return Profiler(jsonl_path=path, **context)
@@ -1,10 +1,39 @@
-from textblob import TextBlob
+import os
+import re
+import time
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
 
-df = pd.read_csv("parsed_chat.csv")
+POLARITY_CACHE_SIZE = 200_000
+
+DEFAULT_BACKEND = "textblob"
+
+# Words that flip the next scored word in the lexicon backend
+NEGATIONS = ["no", "not", "n't", "never"]
+
+# Category order of the Sentiment column: index = sign(polarity) + 1
+SENTIMENT_LABELS = ["Negative", "Neutral", "Positive"]
+
+
+# ------------------ POLARITY ------------------
+@lru_cache(maxsize=POLARITY_CACHE_SIZE)
+def get_polarity(text):
+    # Imported here: textblob pulls in nltk, which is slow to import
+    from textblob import TextBlob
+
+    return TextBlob(text).sentiment.polarity
+
+
+def label_codes(polarity):
+    """`SENTIMENT_LABELS` codes for polarity scores (NaN counts as Neutral)."""
+    polarity = np.nan_to_num(np.asarray(polarity, dtype=float))
+    return (np.sign(polarity) + 1).astype(np.int8)
+
 
 def get_sentiment(text):
-    polarity = TextBlob(str(text)).sentiment.polarity
+    polarity = get_polarity(str(text))
     if polarity > 0:
         return "Positive"
     elif polarity < 0:
@@ -12,5 +41,180 @@ def get_sentiment(text):
     else:
         return "Neutral"
 
-df["Sentiment"] = df["Message"].apply(get_sentiment)
-print(df["Sentiment"].value_counts())
+
+# ------------------ BACKENDS ------------------
+# A backend turns a list of message texts into an array of polarity scores
+# in [-1, 1]; the label is the score's sign.
+class TextBlobBackend:
+    """TextBlob's pattern analyzer, one message at a time (memoized by `get_polarity`)."""
+
+    name = "textblob"
+
+    def polarities(self, texts):
+        return np.fromiter((get_polarity(str(text)) for text in texts), dtype=float, count=len(texts))
+
+
+class LexiconBackend:
+    """TextBlob's word lexicon applied to whole batches with NumPy.
+
+    Messages are tokenized with one regex, every distinct token is looked
+    up once, and the per-token rules of the pattern analyzer are applied
+    as array operations: a known adverb scales the next word ("very good"),
+    a negation up to one short word before flips it to -0.5x ("not good",
+    "not a good"), each "!" after a word boosts it by 1.25x, and emoticons
+    count as words. The message score is the mean over its scored words.
+    Unlike TextBlob, modifiers and negations only look one word back.
+    The lexicon ships inside the textblob package, so nothing is downloaded.
+    """
+
+    name = "lexicon"
+
+    def __init__(self):
+        self.words, self.emoticons = _lexicon_tables()
+        emoticons = "|".join(map(re.escape, sorted(self.emoticons, key=len, reverse=True)))
+        self.token_pattern = re.compile(
+            rf"(?<!\S)(?:{emoticons})(?!\S)|n't\b|[^\W_]+?(?=n't\b)|[^\W_]+|!"
+        )
+
+    def polarities(self, texts):
+        tokens = [self.token_pattern.findall(str(text).lower()) for text in texts]
+        lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+        row = np.repeat(np.arange(len(tokens)), lengths)
+        codes, uniques = pd.factorize(pd.Series([t for ts in tokens for t in ts], dtype=object))
+
+        # Per distinct token: polarity (NaN = not scored), intensity, flags
+        table = [self.words.get(t) or (self.emoticons.get(t, np.nan), 1.0, False) for t in uniques]
+        polarity = np.array([entry[0] for entry in table], dtype=float)[codes]
+        intensity = np.array([entry[1] for entry in table], dtype=float)[codes]
+        modifier = np.array([entry[2] for entry in table], dtype=bool)[codes]
+        negation = np.isin(uniques, NEGATIONS)[codes]
+        short = np.array([len(t.strip("'")) <= 1 for t in uniques], dtype=bool)[codes]
+        bang = (uniques == "!")[codes] if len(uniques) else np.zeros(0, dtype=bool)
+
+        known = ~np.isnan(polarity)
+        same = np.zeros(len(row), dtype=bool)
+        same[1:] = row[1:] == row[:-1]
+        same2 = np.zeros(len(row), dtype=bool)
+        same2[2:] = row[2:] == row[:-2]
+
+        # Negation right before, or before one short unknown word
+        negated = np.zeros(len(row), dtype=bool)
+        negated[1:] = same[1:] & negation[:-1]
+        negated[2:] |= same2[2:] & negation[:-2] & short[1:-1] & ~known[1:-1]
+        negated &= known
+
+        # A known adverb followed by a known word merges into one score
+        merged = np.zeros(len(row), dtype=bool)
+        merged[1:] = same[1:] & known[1:] & modifier[:-1] & known[:-1]
+        score = polarity.copy()
+        score[1:][merged[1:]] = np.clip(polarity[1:] * intensity[:-1], -1, 1)[merged[1:]]
+        negated[1:] |= merged[1:] & negated[:-1]
+        scored = known.copy()
+        scored[:-1] &= ~merged[1:]
+
+        # "!" boosts the last score before it, up to the next score
+        positions = np.flatnonzero(scored)
+        bangs = np.concatenate([[0], np.cumsum(bang)])
+        ends = np.minimum(np.append(positions[1:], len(row)), np.searchsorted(row, row[positions], side="right"))
+        boosts = bangs[ends] - bangs[positions + 1]
+        values = np.clip(score[positions] * 1.25 ** boosts, -1, 1)
+        values = np.where(negated[positions], values * -0.5, values)
+
+        total = np.bincount(row[positions], weights=values, minlength=len(tokens))
+        count = np.bincount(row[positions], minlength=len(tokens))
+        return total / np.maximum(count, 1)
+
+
+@lru_cache(maxsize=None)
+def _lexicon_tables():
+    """({word: (polarity, intensity, is adverb)}, {emoticon: polarity}) from TextBlob's data."""
+    from textblob.en import sentiment as lexicon
+    from textblob._text import EMOTICONS
+
+    lexicon.load()
+    words = {
+        word: (float(scores[None][0]), float(scores[None][2]), "RB" in scores)
+        for word, scores in dict.items(lexicon)
+    }
+    emoticons = {face.lower(): polarity for (_, polarity), faces in EMOTICONS.items() for face in faces}
+    return words, emoticons
+
+
+BACKENDS = {backend.name: backend for backend in (TextBlobBackend, LexiconBackend)}
+
+
+@lru_cache(maxsize=None)
+def get_backend(name=None):
+    """Backend instance by name; SENTIMENT_BACKEND (default "textblob") when None."""
+    name = name or os.environ.get("SENTIMENT_BACKEND") or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"unknown sentiment backend {name!r}, expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+# ------------------ BATCH ENGINE ------------------
+class SentimentEngine:
+    """Score a whole message column at once.
+
+    Identical messages ("ok", "<media omitted>", "haha", ...) are scored
+    once: the column is factorized, only the unique texts go through the
+    backend (in batches of `batch_size`) and the labels are broadcast back
+    with the factorize codes. With the default TextBlob backend labels
+    match `get_sentiment` row for row. Labels come back as a categorical
+    with `SENTIMENT_LABELS` as categories.
+    """
+
+    def __init__(self, batch_size=10_000, backend=None):
+        self.batch_size = batch_size
+        self.backend = get_backend(backend)
+        self.stats = {}
+
+    def polarities(self, texts):
+        scores = np.empty(len(texts), dtype=float)
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            scores[start:start + len(batch)] = self.backend.polarities(batch)
+        return scores
+
+    def score(self, messages):
+        start = time.perf_counter()
+        codes, uniques = pd.factorize(messages, use_na_sentinel=False)
+        labels = pd.Categorical.from_codes(
+            label_codes(self.polarities(np.asarray(uniques, dtype=object)))[codes], SENTIMENT_LABELS
+        )
+        seconds = time.perf_counter() - start
+
+        self.stats = {
+            "backend": self.backend.name,
+            "messages": len(codes),
+            "unique": len(uniques),
+            "seconds": seconds,
+            "messages_per_sec": len(codes) / seconds if seconds else float("inf"),
+        }
+        return pd.Series(labels, index=messages.index, name=messages.name)
+
+
+def score_sentiment(messages, batch_size=10_000, backend=None):
+    return SentimentEngine(batch_size, backend).score(messages)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from chat_parser import parse_chat
+    from storage import columnar_format, load_chat_file
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "parsed_chat.csv"
+    backend = sys.argv[2] if len(sys.argv) > 2 else None
+    if columnar_format(path):
+        df = load_chat_file(path, columns=["Message"])
+    elif path.lower().endswith(".txt"):
+        df = parse_chat(path)
+    else:
+        df = pd.read_csv(path)
+
+    engine = SentimentEngine(backend=backend)
+    df["Sentiment"] = engine.score(df["Message"])
+    print(df["Sentiment"].value_counts())
+    print(f"{engine.stats['backend']}: {engine.stats['messages']} messages ({engine.stats['unique']} unique) "
+          f"in {engine.stats['seconds']:.2f}s, {engine.stats['messages_per_sec']:,.0f} messages/sec")
@@ -0,0 +1,82 @@
+import os
+
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from chat_parser import sort_chat
+
+# Low-cardinality text columns, stored dictionary-encoded
+CATEGORY_COLUMNS = ["User", "Sentiment", "DayName", "MonthName"]
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+FEATHER_SUFFIXES = (".feather", ".arrow")
+
+
+def columnar_format(name):
+    """"parquet" / "feather" from a file name, or None for anything else."""
+    suffix = os.path.splitext(str(name))[1].lower()
+    if suffix in PARQUET_SUFFIXES:
+        return "parquet"
+    if suffix in FEATHER_SUFFIXES:
+        return "feather"
+    return None
+
+
+def _format(name, format=None):
+    format = format or columnar_format(name)
+    if format is None:
+        raise ValueError(f"Unknown columnar format for {name!r}; use .parquet or .feather")
+    return format
+
+
+# ------------------ COLUMNAR LAYOUT ------------------
+def to_columnar(df):
+    """Parsed chat -> Arrow table: real timestamps, categoricals, no index."""
+    out = df.reset_index(drop=True)
+    for column in CATEGORY_COLUMNS:
+        if column in out:
+            out[column] = out[column].astype("category")
+    for column in ("Emojis", "Words"):
+        if column in out:
+            out[column] = out[column].map(list)
+    return pa.Table.from_pandas(out, preserve_index=False)
+
+
+# ------------------ SAVE / LOAD ------------------
+def save_chat(df, path, format=None):
+    """Write a parsed (optionally enriched) chat as Parquet or Feather.
+
+    Feather files are written uncompressed so `load_chat_file` can memory
+    map them; Parquet files are smaller but have to be decoded on load.
+    """
+    table = to_columnar(df)
+    if _format(path, format) == "parquet":
+        pq.write_table(table, path)
+    else:
+        feather.write_feather(table, path, compression="uncompressed")
+
+
+def load_chat_file(source, columns=None, format=None):
+    """Load a chat saved by `save_chat`, reading only `columns` if given.
+
+    `source` is a path (memory-mapped) or a binary file object; pass
+    `format` when it is a file object without a `.name`. Rows come back in
+    time order, as the parser gives them.
+    """
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+    if _format(name, format) == "parquet":
+        table = pq.read_table(source, columns=columns, memory_map=True)
+    else:
+        table = feather.read_table(source, columns=columns, memory_map=True)
+    return sort_chat(table.to_pandas())
+
+
+def chat_to_bytes(df, format="parquet"):
+    sink = pa.BufferOutputStream()
+    table = to_columnar(df)
+    if format == "parquet":
+        pq.write_table(table, sink)
+    else:
+        feather.write_feather(table, sink, compression="uncompressed")
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,92 @@
+import re
+from collections import Counter
+from functools import lru_cache
+from itertools import islice
+
+# Same filter the "Most Common Words" panel uses
+STOP_WORDS = {
+    "media", "omitted", "<media", "omitted>", "this", "message", "was", "deleted",
+    "the", "and", "to", "a", "in", "of"
+}
+
+
+# ------------------ EMOJI EXTRACT ------------------
+_END = -1
+
+
+def _trie_pattern(node):
+    alternatives = [
+        re.escape(bytes([byte])) + _trie_pattern(node[byte])
+        for byte in sorted(node) if byte != _END
+    ]
+    if not alternatives:
+        return b""
+    pattern = alternatives[0] if len(alternatives) == 1 else b"(?:" + b"|".join(alternatives) + b")"
+    if _END in node:
+        # greedy "?" keeps going while a longer emoji still matches
+        pattern = b"(?:" + pattern + b")?"
+    return pattern
+
+
+@lru_cache(maxsize=None)
+def emoji_pattern():
+    """Longest-match regex for every `emoji.EMOJI_DATA` key, over UTF-8 bytes.
+
+    Built as a trie so ZWJ sequences, skin tones, flags and keycaps match as
+    one emoji. It works on bytes because `re` can only test astral (non-BMP)
+    characters against a charset by scanning a list of ranges, while a
+    leading byte is a single bitmap lookup, so non-emoji text is skipped
+    in C.
+    """
+    import emoji
+
+    trie = {}
+    for key in emoji.EMOJI_DATA:
+        node = trie
+        for byte in key.encode("utf-8"):
+            node = node.setdefault(byte, {})
+        node[_END] = True
+    return re.compile(_trie_pattern(trie))
+
+
+def extract_emojis(text):
+    # every EMOJI_DATA key has a non-ASCII code point
+    if text.isascii():
+        return []
+    return [match.decode("utf-8") for match in emoji_pattern().findall(text.encode("utf-8"))]
+
+
+# Messages matched per regex scan by `count_emojis`
+EMOJI_CHUNK = 1_000
+
+
+def count_emojis(messages, counter=None, chunk_size=EMOJI_CHUNK):
+    """Count the emojis of `messages` into `counter`.
+
+    Messages are joined and encoded `chunk_size` at a time, so each scan
+    runs in C over a bounded buffer instead of a copy of the whole chat;
+    matches are decoded once per distinct emoji in a chunk.
+    """
+    counter = Counter() if counter is None else counter
+    pattern = emoji_pattern()
+    messages = iter(messages)
+    while chunk := list(islice(messages, chunk_size)):
+        data = "\n".join(chunk).encode("utf-8")
+        for match, count in Counter(map(re.Match.group, pattern.finditer(data))).items():
+            counter[match.decode("utf-8")] += count
+    return counter
+
+
+# ------------------ WORDS ------------------
+def extract_words(text, stop_words=STOP_WORDS):
+    return [
+        word for word in text.split()
+        if word.lower() not in stop_words and word.isalpha()
+    ]
+
+
+def count_words(messages, stop_words=STOP_WORDS, counter=None):
+    counter = Counter() if counter is None else counter
+    for msg in messages:
+        counter.update(extract_words(msg, stop_words))
+    return counter
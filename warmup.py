@@ -0,0 +1,86 @@
+"""Background warm-up of the resources the first analysis needs, and an offline bundle of them.
+
+The app calls `start()` at launch: the default sentiment backend, the
+emoji table and the NLTK corpora TextBlob uses are loaded in a daemon
+thread while the upload widget is already on screen. A backend picked
+later in the app is loaded the same way by `start_backend()`. For containers without network
+access, bake the corpora into the image once:
+
+    python warmup.py --bundle nltk_data
+
+and run with NLTK_DATA=nltk_data (NLTK's own search path variable) and
+ANALYZER_OFFLINE=1, which turns the download attempt off.
+"""
+import argparse
+import os
+import threading
+
+from pipeline import init_worker
+from text_features import emoji_pattern
+
+# NLTK package -> resource path `nltk.data.find` looks for
+NLTK_RESOURCES = {"punkt": "tokenizers/punkt", "brown": "corpora/brown"}
+
+
+def offline():
+    return os.environ.get("ANALYZER_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+def ensure_nltk_data():
+    """Download missing NLTK corpora (unless offline); returns the ones still missing."""
+    import nltk
+
+    missing = []
+    for name, resource in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            if offline() or not nltk.download(name, quiet=True):
+                missing.append(name)
+    return missing
+
+
+def warm_up(backend=None):
+    """Load what analysing the first upload would otherwise wait for."""
+    # Needed by every analysis, so these go before the (possibly slow) download
+    init_worker(backend)
+    emoji_pattern()
+    ensure_nltk_data()
+
+
+def start(backend=None):
+    """Run `warm_up` in a daemon thread and return the thread."""
+    thread = threading.Thread(target=warm_up, args=(backend,), name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_backend(backend):
+    """Load one sentiment backend in a daemon thread and return the thread."""
+    thread = threading.Thread(target=init_worker, args=(backend,), name=f"warm-up {backend}", daemon=True)
+    thread.start()
+    return thread
+
+
+def bundle(path):
+    """Download the NLTK corpora into `path`; returns the packages that failed."""
+    import nltk
+
+    os.makedirs(path, exist_ok=True)
+    return [name for name in NLTK_RESOURCES if not nltk.download(name, download_dir=path, quiet=True)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bundle", metavar="DIR", required=True,
+                        help="folder to download the NLTK corpora into (use it as NLTK_DATA)")
+    args = parser.parse_args()
+
+    failed = bundle(args.bundle)
+    if failed:
+        raise SystemExit(f"could not download: {', '.join(failed)}")
+    print(f"NLTK corpora saved to {args.bundle}; run with NLTK_DATA={args.bundle} ANALYZER_OFFLINE=1")
+
+
+if __name__ == "__main__":
+    main()